@@ -8,3 +8,104 @@ CHROMA_API_KEY = os.getenv("CHROMA_API_KEY")
 TENANT_ID = os.getenv("TENANT_ID")
 DB_NAME = os.getenv("DB_NAME", "Guide")
 MONGODB_URI = os.getenv("MONGODB_URL")
+
+# MongoDB: one shared Motor client per worker
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "notes_summarizer")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+# Gemini HTTP client (shared, pooled connections)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "200"))
+GEMINI_MAX_KEEPALIVE = int(os.getenv("GEMINI_MAX_KEEPALIVE", "50"))
+
+# LLM response cache (in-memory LRU + sqlite)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3")
+LLM_CACHE_MEMORY_ITEMS = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "256"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds, 0 disables
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Background summarize jobs ("memory" or "sqlite" for restart-safe jobs)
+JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "cache/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))  # seconds finished jobs are kept
+
+# Chroma ingestion (capped by the server's max batch size)
+CHROMA_BATCH_SIZE = int(os.getenv("CHROMA_BATCH_SIZE", "100"))
+CHROMA_UPLOAD_WORKERS = int(os.getenv("CHROMA_UPLOAD_WORKERS", "4"))
+
+# Vector store backend: "chroma" (Chroma Cloud) or "local" (embedded NumPy/HNSW)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", "vector_store")
+LOCAL_ANN_THRESHOLD = int(os.getenv("LOCAL_ANN_THRESHOLD", "20000"))  # rows before HNSW is used
+
+# Chunk embedding cache (sqlite)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3")
+
+# Load ML models in the background at startup (otherwise on first use)
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "true").lower() in ("1", "true", "yes")
+# Seconds before a failed model load may be retried (doubles per failure, capped)
+MODEL_RETRY_BACKOFF = float(os.getenv("MODEL_RETRY_BACKOFF", "30"))
+MODEL_RETRY_BACKOFF_MAX = float(os.getenv("MODEL_RETRY_BACKOFF_MAX", "600"))
+
+# Sentence embeddings: model and cross-request micro-batching
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))  # 0 = encode in a thread in this process
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "10"))
+
+# PDF extraction: page ranges go to worker processes for large documents
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGE_BATCH = int(os.getenv("PDF_PAGE_BATCH", "16"))
+
+# Chunking: "token" (token-bounded, heading-aware) or "regex" (legacy)
+PDF_CHUNKER = os.getenv("PDF_CHUNKER", "token")
+CHUNK_TARGET_TOKENS = int(os.getenv("CHUNK_TARGET_TOKENS", "200"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "320"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "30"))
+
+# Map-reduce summarization for documents larger than one prompt
+SUMMARY_MAP_THRESHOLD_TOKENS = int(os.getenv("SUMMARY_MAP_THRESHOLD_TOKENS", "12000"))
+SUMMARY_GROUP_TOKENS = int(os.getenv("SUMMARY_GROUP_TOKENS", "4000"))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "8"))
+
+# Streaming TTS: sentences synthesized in parallel, delivered in order
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", "3"))
+TTS_STREAM_LATENCY_LEVEL = int(os.getenv("TTS_STREAM_LATENCY_LEVEL", "2"))  # ElevenLabs 0-4
+
+# Speech-to-text: transcriptions run on a bounded thread pool
+STT_WORKERS = int(os.getenv("STT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Realtime conversation memory: recent turns verbatim, older turns summarized
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "4"))
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1500"))    # whole prompt context
+MEMORY_HISTORY_TOKENS = int(os.getenv("MEMORY_HISTORY_TOKENS", "600"))  # summary + recent turns
+
+# Realtime session state: "memory" (this process) or "redis" (shared by workers)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_TTL = int(os.getenv("SESSION_TTL", "3600"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Password hashing: bcrypt cost and the worker threads it runs on
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Auth caches: decoded tokens (LRU, never past exp) and users (short TTL)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "5000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+# Build the current user from access-token claims, with no database lookup;
+# profile changes then only show up once the access token is reissued
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "false").lower() in ("1", "true", "yes")
+
+# Generated audio: "local" (content-addressed files served by /audio) or
+# "cloudinary" (same, plus a background upload of summary audio to Cloudinary)
+AUDIO_BACKEND = os.getenv("AUDIO_BACKEND", "cloudinary")
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", "audio_store")
+# Origin prefixed to /audio links in responses; empty uses the request's own host
+AUDIO_PUBLIC_BASE_URL = os.getenv("AUDIO_PUBLIC_BASE_URL", "").rstrip("/")
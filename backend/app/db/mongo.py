@@ -1,20 +1,44 @@
 # app/db/mongo.py
 
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
-from pymongo import IndexModel, ASCENDING
+from pymongo import IndexModel, ASCENDING, DESCENDING
 
-load_dotenv()
+from app.config import (
+    MONGODB_URI, MONGO_DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
 
-MONGO_URL = os.getenv("MONGODB_URL")
-client = AsyncIOMotorClient(MONGO_URL)
+# One Motor client (and connection pool) per worker, shared by every route
+# and service. Motor binds to the running event loop on first use.
+client = AsyncIOMotorClient(
+    MONGODB_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
 
-db = client["notes_summarizer"]
+db = client[MONGO_DB_NAME]
 summary_collection = db["summaries"]
+quizzes_collection = db["quizzes"]
+timed_quiz_scores_collection = db["timed_quiz_scores"]
 users_collection = db["users"]
 
-# Create unique index on email
+# Create unique index on email, plus the indexes behind summary listing
+# (newest first, optionally per owner) and quiz lookup by summary
 async def setup_db_indexes():
     # Create an index on email to ensure uniqueness
     await users_collection.create_index([("email", ASCENDING)], unique=True)
+    await summary_collection.create_indexes([
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel([("name", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="name_created_at_id"),
+        # Background jobs write at most one summary per job, even when re-run
+        IndexModel([("job_id", ASCENDING)], name="job_id", unique=True, sparse=True),
+    ])
+    await quizzes_collection.create_indexes([
+        IndexModel([("summary_id", ASCENDING)], name="summary_id"),
+        IndexModel([("job_id", ASCENDING)], name="job_id", unique=True, sparse=True),
+    ])
+
+def close_client():
+    client.close()
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import List, Optional, Union
 
 class QuizQuestion(BaseModel):
@@ -15,7 +16,37 @@ class SummarizeResponse(BaseModel):
     #quiz: List[QuizQuestion]
     summary_id: Optional[str] = None
    # quiz_id: Optional[str] = None
+    timings: Optional[dict] = None
 
 class ChatResponse(BaseModel):
     text: str
     audio_url: str | None
+
+# Mongo read models. Routes return raw documents through FastJSONResponse,
+# so these only describe the payload (OpenAPI); _id is serialized as a string.
+class SummaryListItem(BaseModel):
+    id: str = Field(alias="_id")
+    name: Optional[str] = None
+    filename: Optional[str] = None
+    audio_path: Optional[str] = None
+    score: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class SummaryPage(BaseModel):
+    items: List[SummaryListItem]
+    next_cursor: Optional[str] = None
+
+class SummaryDetail(BaseModel):
+    id: str = Field(alias="_id")
+    name: Optional[str] = None
+    summary: Optional[str] = None
+    audio_path: Optional[str] = None
+
+class QuizDocument(BaseModel):
+    id: str = Field(alias="_id")
+    filename: Optional[str] = None
+    base_id: Optional[str] = None
+    summary_id: Optional[str] = None
+    questions: List[QuizQuestion]
+    name: Optional[str] = None
+    created_at: Optional[datetime] = None
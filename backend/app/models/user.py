@@ -44,3 +44,5 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[str] = None
+    name: Optional[str] = None
+    created_at: Optional[datetime] = None
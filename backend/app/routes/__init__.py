@@ -1,2 +1,2 @@
 # Import the routes so they can be imported from app.routes
-from . import summarizer, chat, realtime_chat, auth
+from . import summarizer, chat, realtime_chat, auth, health, audio
@@ -0,0 +1,95 @@
+import os
+import re
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from app.services import audio_storage
+
+router = APIRouter()
+
+CHUNK_SIZE = 64 * 1024
+# Content-addressed files never change, so clients may cache them forever
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def _iter_file(path: str, start: int, length: int):
+    # Sync generator: Starlette iterates it in a worker thread
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def _parse_range(header: str, size: int):
+    """
+    (start, end) for a single "bytes=a-b" range. None means ignore the header
+    and send the whole file (malformed, multiple ranges, empty file); raises
+    RangeNotSatisfiable when the range lies outside the file.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ("", "") or size == 0:
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None  # invalid syntax, not merely unsatisfiable
+    if start >= size:
+        raise RangeNotSatisfiable()
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/"x" matches "x"."""
+    if header.strip() == "*":
+        return True
+    return any(t.strip().removeprefix("W/") == etag for t in header.split(","))
+
+@router.api_route("/audio/{key}.mp3", methods=["GET", "HEAD"])
+async def get_audio(key: str, request: Request):
+    """Stream stored audio with Range, ETag and Cache-Control support"""
+    if not audio_storage.KEY.match(key):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    path = audio_storage.path_for(key)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    status_code, start, length = 200, 0, size
+    range_header = request.headers.get("range")
+    # If-Range with another validator means the client's copy is stale: send it all
+    if range_header and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = _parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status_code, length = 206, end - start + 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(length)
+    if request.method == "HEAD":
+        return Response(status_code=status_code, media_type="audio/mpeg", headers=headers)
+    return StreamingResponse(_iter_file(path, start, length), status_code=status_code,
+                             media_type="audio/mpeg", headers=headers)
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from datetime import datetime, timedelta
 from app.models.user import UserCreate, UserLogin, UserResponse, Token, UserInDB
 from app.utils.auth import (
-    get_password_hash, 
+    hash_password,
     authenticate_user, 
     create_access_token,
+    access_token_claims,
     create_refresh_token,
     refresh_access_token,
     get_current_user,
@@ -31,7 +32,7 @@ async def register_user(user_data: UserCreate):
     # Create user object with hashed password
     user_dict = user_data.dict()
     password = user_dict.pop("password")
-    hashed_password = get_password_hash(password)
+    hashed_password = await hash_password(password)
     
     user_in_db = {
         "email": user_dict["email"],
@@ -48,7 +49,7 @@ async def register_user(user_data: UserCreate):
         # Create access and refresh tokens for the new user
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user_dict["email"], "user_id": user_id}, 
+            data=access_token_claims(user_id, user_dict["email"], user_dict["name"], user_in_db["created_at"]), 
             expires_delta=access_token_expires
         )
         
@@ -84,7 +85,7 @@ async def login_for_access_token(user_credentials: UserLogin):
     # Create access and refresh tokens
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id}, 
+        data=access_token_claims(user.id, user.email, user.name, user.created_at), 
         expires_delta=access_token_expires
     )
     
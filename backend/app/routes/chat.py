@@ -1,62 +1,89 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from app.services import chromadb_service, gemini_service, tts_service
-from app.services.cloudinary_services import upload_audio_to_cloudinary
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.services import rag_service, gemini_service, tts_service, audio_storage
+from app.services.audio_decoder import AudioDecodeError
 from app.models.schemas import ChatResponse
-import os
-import time
-import aiofiles
-
-# Ensure directories exist
-os.makedirs("uploads", exist_ok=True)
-os.makedirs("audio", exist_ok=True)
+import json
+import asyncio
 
 router = APIRouter()
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_bot(
+    request: Request,
     file: UploadFile = File(None),  # Optional audio input
-    query: str = Form(None)         # Optional text input
+    query: str = Form(None),        # Optional text input
+    stream: bool = Form(False),     # Stream the answer over SSE
+    collection: str = Form(None)    # PDF collection to ground the answer in
 ):
     """
     Chat endpoint: accepts either audio or text query.
-    Returns: Bot response in text + audio URL
+    Returns: Bot response in text + audio URL, or an SSE stream of
+    text deltas followed by a final event with the audio URL.
     """
     if not file and not query:
         raise HTTPException(status_code=400, detail="❌ No input provided.")
 
     # 1️⃣ If audio, convert to text using STT
     if file:
-        file_path = f"uploads/{int(time.time())}_{file.filename}"
+        # Decoded in memory: the upload never touches disk
+        from app.services.stt_service import transcribe_audio
         try:
-            async with aiofiles.open(file_path, "wb") as f:
-                await f.write(await file.read())
+            query = await transcribe_audio(await file.read())
+        except AudioDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"⚠️ Could not decode audio: {e}")
 
-            from app.services.stt_service import speech_to_text
-            query = speech_to_text(file_path)
+        if not query.strip():
+            raise HTTPException(status_code=400, detail="⚠️ Speech-to-text failed, no words detected.")
 
-            if not query.strip():
-                raise HTTPException(status_code=400, detail="⚠️ Speech-to-text failed, no words detected.")
-        finally:
-            # Clean up uploaded file after processing
-            if os.path.exists(file_path):
-                os.remove(file_path)
+    # 2️⃣ Retrieve context from the selected collection (none: answer without context)
+    combined_context = ""
+    if collection:
+        try:
+            combined_context = await rag_service.retrieve_context_async(query, collection, top_k=3)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
 
-    # 2️⃣ Retrieve context from ChromaDB
-    context = chromadb_service.query(query, top_k=3)
-    combined_context = " ".join([doc for docs in context.get("documents", []) for doc in docs]) or ""
+    # 3️⃣ Stream the answer as server-sent events if requested
+    if stream:
+        return StreamingResponse(
+            _stream_chat(query, combined_context, str(request.base_url)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
     # 3️⃣ Generate response using Gemini
-    response_text = gemini_service.get_answer(query, combined_context)
+    response_text = await gemini_service.get_answer(query, combined_context)
+
+    # 4️⃣ + 5️⃣ Convert response to speech and upload for access
+    audio_url = await _speak(response_text, str(request.base_url))
+
+    return ChatResponse(text=response_text, audio_url=audio_url)
 
-    # 4️⃣ Convert response to speech
-    audio_filename = f"audio/chat_{int(time.time())}.mp3"
-    await tts_service.generate_audio(response_text, audio_filename)
+async def _speak(response_text: str, base_url: str):
+    """Synthesize the reply, store it and return a URL that plays immediately (served locally, never published)."""
+    audio_bytes = await asyncio.to_thread(tts_service.text_to_speech_bytes, response_text)
+    return audio_storage.public_url(await audio_storage.save(audio_bytes), base_url)
 
-    # 5️⃣ Upload to Cloudinary for access
-    audio_url = upload_audio_to_cloudinary(audio_filename)
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    # Clean up local audio file after upload
-    if os.path.exists(audio_filename):
-        os.remove(audio_filename)
+async def _stream_chat(query: str, context: str, base_url: str):
+    """SSE body: `delta` events with text as it is generated, then `done`."""
+    parts = []
+    try:
+        async for delta in gemini_service.stream_answer(query, context):
+            parts.append(delta)
+            yield _sse("delta", {"text": delta})
+    except Exception as e:
+        print(f"⚠️ Streaming answer failed: {e}")
+        yield _sse("error", {"message": "Failed to generate answer."})
+        return
 
-    return ChatResponse(text=response_text, audio_url=audio_url)
\ No newline at end of file
+    response_text = "".join(parts).strip()
+    try:
+        audio_url = await _speak(response_text, base_url)
+    except Exception as e:
+        print(f"TTS Error: {e}")
+        audio_url = None
+    yield _sse("done", {"text": response_text, "audio_url": audio_url})
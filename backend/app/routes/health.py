@@ -0,0 +1,37 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services import model_registry, embedding_service, stt_service
+from app.utils import auth
+
+router = APIRouter()
+
+@router.get("/live")
+async def liveness():
+    """Process is up and serving requests"""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness():
+    """Ready once every required model is loaded and warmed up"""
+    status = model_registry.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@router.get("/embeddings")
+async def embedding_stats():
+    """Micro-batching encoder counters (batch sizes, queue depth)"""
+    return embedding_service.stats()
+
+@router.get("/stt")
+async def stt_stats():
+    """Speech-to-text pool counters (queue depth, latency, recognizer reuse)"""
+    return stt_service.stats()
+
+@router.get("/auth")
+async def auth_stats():
+    """Password hashing pool counters (queue depth, latency, rehashes)"""
+    return auth.hashing_stats()
+
+@router.get("/auth/cache")
+async def auth_cache_stats():
+    """Token and user cache hit rates"""
+    return auth.auth_cache_stats()
@@ -1,18 +1,51 @@
-import tempfile
-import subprocess
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services import stt_service, tts_service, rag_service, gemini_service
-import os
-import base64
+from app.services import session_store
+from app.services.conversation_memory import ConversationMemory
+import asyncio
+import re
+import uuid
 
 router = APIRouter()
-active_sessions = {}
+active_sessions = {}  # connections on this worker; durable state is in session_store
+SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+# Text control messages:
+#   SET_COLLECTION:<name>    choose the PDF collection for retrieval
+#   START_STREAM[:<rate>]    following binary frames are raw 16-bit mono PCM
+#                            (default 16000 Hz); partial transcripts are pushed
+#                            live and each detected utterance is answered
+#   STOP_STREAM              flush the recognizer and go back to blob mode
+# Outside streaming mode each binary message is one complete recorded clip.
+#
+# Connect with ?session_id=<id> to resume a session (on any worker); the id
+# to use is sent back as {"type": "session", "session_id": ...} on connect.
 
 @router.websocket("/ws/assistant")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, session_id: str = None):
     await websocket.accept()
-    session_id = id(websocket)
-    active_sessions[session_id] = {"context": "", "collection": None}
+    if not session_id or not SESSION_ID.match(session_id):
+        session_id = uuid.uuid4().hex
+    try:
+        saved = await session_store.get_store().load(session_id) or {}
+    except Exception as e:
+        print(f"⚠️ Could not load session {session_id}: {e}")
+        saved = {}
+
+    connection_id = id(websocket)
+    active_sessions[connection_id] = {
+        "session_id": session_id,
+        "memory": ConversationMemory.from_dict(saved.get("memory", {})),
+        "collection": saved.get("collection"),
+        "recognizer": None,
+        "send_lock": asyncio.Lock(),
+        "turn_lock": asyncio.Lock(),
+        "turns": set(),
+    }
+    user_session = active_sessions[connection_id]
+    user_session["memory"].on_update = lambda: _persist(user_session)
+    user_session["memory"].start_summarizing()  # finish turns another worker left pending
+    await _send_json(user_session, websocket, {"type": "session", "session_id": session_id})
 
     try:
         while True:
@@ -24,92 +57,54 @@ async def websocket_endpoint(websocket: WebSocket):
                 print(f"Error receiving message: {e}")
                 break
 
+            if message.get("type") == "websocket.disconnect":
+                break
+
             # If frontend sends JSON (text message)
-            if "text" in message:
+            if message.get("text") is not None:
                 data = message["text"]
                 if data.startswith("SET_COLLECTION:"):
                     collection_name = data.replace("SET_COLLECTION:", "").strip()
-                    active_sessions[session_id]["collection"] = collection_name
+                    user_session["collection"] = collection_name
+                    await _persist(user_session)
                     continue
+                if data.startswith("START_STREAM"):
+                    await _start_stream(websocket, user_session, data)
+                    continue
+                if data.startswith("STOP_STREAM"):
+                    await _stop_stream(websocket, user_session)
+                    continue
+
+            # If frontend streams raw PCM
+            if message.get("bytes") is not None and user_session["recognizer"] is not None:
+                await _accept_pcm(websocket, user_session, message["bytes"])
+                continue
 
             # If frontend sends audio (binary)
-            if "bytes" in message:
+            if message.get("bytes") is not None:
                 try:
-                    data = message["bytes"]
-
-                    # same as your flow...
-                    with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as tmp_webm:
-                        tmp_webm.write(data)
-                        tmp_webm_path = tmp_webm.name
-
-                    tmp_wav_path = tmp_webm_path.replace(".webm", ".wav")
-                    subprocess.run([
-                        "ffmpeg", "-y", "-i", tmp_webm_path, "-ar", "16000", "-ac", "1", tmp_wav_path
-                    ], check=True)
-
-                    user_query = stt_service.speech_to_text(tmp_wav_path)
-
-                    # Clean up temp files
-                    try:
-                        os.remove(tmp_webm_path)
-                        os.remove(tmp_wav_path)
-                    except OSError:
-                        pass  # Ignore file cleanup errors
-
-                    if not user_query.strip():
-                        continue
-
-                    await websocket.send_json({"type": "user", "content": user_query})
-
-                    # ✅ Use dynamic collection
-                    user_session = active_sessions[session_id]
-                    collection_name = user_session.get("collection")
-                    if not collection_name:
-                        await websocket.send_json({
-                            "type": "error",
-                            "message": "No collection selected. Please set collection first."
-                        })
-                        continue
-
-                    rag_context = rag_service.retrieve_context(user_query, collection_name)
-                    combined_context = f"{user_session['context']} {rag_context}".strip()
-
-                    answer = gemini_service.get_answer(user_query, combined_context)
-
-                    user_session["context"] = combined_context + " " + answer
-
-                    # Handle TTS with error checking
-                    try:
-                        audio_bytes = tts_service.text_to_speech_bytes(answer)
-                        if audio_bytes:
-                            audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
-                            response_data = {
-                                "type": "assistant",
-                                "text": answer,
-                                "audio": audio_b64
-                            }
-                        else:
-                            # TTS failed, send text only
-                            response_data = {
-                                "type": "assistant",
-                                "text": answer
-                            }
-                    except Exception as tts_error:
-                        print(f"TTS Error: {tts_error}")
-                        # Send text-only response if TTS fails
-                        response_data = {
-                            "type": "assistant",
-                            "text": answer
-                        }
-
-                    await websocket.send_json(response_data)
-                    
+                    # Decoded in memory: no temp files or blocking subprocess
+                    user_query = await stt_service.transcribe_audio(message["bytes"])
                 except Exception as audio_error:
                     print(f"Audio processing error: {audio_error}")
-                    await websocket.send_json({
+                    await _send_json(user_session, websocket, {
                         "type": "error",
                         "message": "Failed to process audio. Please try again."
                     })
+                    continue
+
+                if not user_query.strip():
+                    continue
+
+                await _send_json(user_session, websocket, {"type": "user", "content": user_query})
+                try:
+                    await _assistant_turn(websocket, user_session, user_query)
+                except Exception as e:
+                    print(f"Assistant turn error: {e}")
+                    await _send_json(user_session, websocket, {
+                        "type": "error",
+                        "message": "Failed to answer. Please try again."
+                    })
 
     except WebSocketDisconnect:
         print("Client disconnected")
@@ -117,5 +112,156 @@ async def websocket_endpoint(websocket: WebSocket):
         print(f"WebSocket error: {e}")
     finally:
         # Clean up session data
-        active_sessions.pop(session_id, None)
-        print(f"Session {session_id} cleaned up")
\ No newline at end of file
+        for task in list(user_session["turns"]):
+            task.cancel()
+        if user_session["recognizer"] is not None:
+            # An accept() may still be running on an STT thread; close after it
+            user_session["recognizer"].close_in_background()
+        user_session["memory"].close()
+        active_sessions.pop(connection_id, None)
+        print(f"Session {session_id} cleaned up")
+
+
+async def _persist(user_session):
+    """Save the durable part of the session (refreshes its TTL)."""
+    state = {"collection": user_session["collection"], "memory": user_session["memory"].to_dict()}
+    try:
+        await session_store.get_store().save(user_session["session_id"], state)
+    except Exception as e:
+        print(f"⚠️ Could not save session {user_session['session_id']}: {e}")
+
+
+async def _send_json(user_session, websocket: WebSocket, data: dict):
+    async with user_session["send_lock"]:
+        await websocket.send_json(data)
+
+
+async def _start_stream(websocket: WebSocket, user_session, command: str):
+    _, _, rate = command.partition(":")
+    sample_rate = int(rate) if rate.strip().isdigit() else 16000
+    try:
+        user_session["recognizer"] = await stt_service.run(stt_service.StreamingRecognizer, sample_rate)
+    except (RuntimeError, ImportError) as e:
+        print(f"⚠️ Could not start speech recognition: {e}")
+        await _send_json(user_session, websocket, {"type": "error", "message": "Speech-to-text is not available."})
+        return
+    await _send_json(user_session, websocket, {"type": "stream_started", "sample_rate": sample_rate})
+
+
+async def _stop_stream(websocket: WebSocket, user_session):
+    recognizer = user_session["recognizer"]
+    if recognizer is None:
+        return
+    user_session["recognizer"] = None
+    try:
+        result = await stt_service.run(recognizer.finalize)
+    except Exception as e:
+        print(f"Speech recognition error: {e}")
+        await _send_json(user_session, websocket, {"type": "error", "message": "Failed to process audio stream."})
+        result = {"text": ""}
+    finally:
+        await stt_service.run(recognizer.close)
+    await _handle_final(websocket, user_session, result["text"])
+    await _send_json(user_session, websocket, {"type": "stream_stopped"})
+
+
+async def _accept_pcm(websocket: WebSocket, user_session, pcm: bytes):
+    try:
+        result = await stt_service.run(user_session["recognizer"].accept, pcm)
+    except Exception as e:
+        # One bad frame shouldn't end the socket; report it and keep streaming
+        print(f"Speech recognition error: {e}")
+        await _send_json(user_session, websocket, {"type": "error", "message": "Failed to process audio stream."})
+        return
+    if result is None:
+        return
+    if result["type"] == "partial":
+        await _send_json(user_session, websocket, result)
+    else:
+        await _handle_final(websocket, user_session, result["text"])
+
+
+async def _handle_final(websocket: WebSocket, user_session, text: str):
+    """Endpoint detected: report the utterance and answer it in the background
+    so partial transcripts keep flowing while the assistant responds."""
+    if not text.strip():
+        return
+    await _send_json(user_session, websocket, {"type": "final", "text": text})
+    await _send_json(user_session, websocket, {"type": "user", "content": text})
+
+    async def run():
+        try:
+            await _assistant_turn(websocket, user_session, text)
+        except Exception as e:
+            print(f"Assistant turn error: {e}")
+            await _send_json(user_session, websocket, {
+                "type": "error",
+                "message": "Failed to answer. Please try again."
+            })
+
+    task = asyncio.create_task(run())
+    user_session["turns"].add(task)
+    task.add_done_callback(user_session["turns"].discard)
+
+
+async def _assistant_turn(websocket: WebSocket, user_session, user_query: str):
+    """Retrieve context, stream the answer text and its sentence audio."""
+    # One answer at a time per connection, in the order utterances arrived
+    async with user_session["turn_lock"]:
+        # ✅ Use dynamic collection
+        collection_name = user_session.get("collection")
+        if not collection_name:
+            await _send_json(user_session, websocket, {
+                "type": "error",
+                "message": "No collection selected. Please set collection first."
+            })
+            return
+
+        # Bounded context: running summary, recent turns and deduped passages
+        memory = user_session["memory"]
+        passages = await rag_service.retrieve_passages_async(user_query, collection_name)
+        combined_context = memory.build_context(passages)
+
+        # Stream text deltas; each finished sentence goes straight to
+        # TTS and its audio is sent as a binary frame, in order
+        send_lock = user_session["send_lock"]
+        splitter = tts_service.SentenceSplitter()
+        speech = tts_service.SpeechPipeline()
+
+        async def send_audio():
+            async for audio_bytes in speech.audio():
+                async with send_lock:
+                    await websocket.send_bytes(audio_bytes)
+
+        audio_sender = asyncio.create_task(send_audio())
+        answer_parts = []
+        try:
+            async for delta in gemini_service.stream_answer(user_query, combined_context):
+                answer_parts.append(delta)
+                for sentence in splitter.feed(delta):
+                    speech.add(sentence)
+                await _send_json(user_session, websocket, {"type": "assistant_delta", "text": delta})
+            for sentence in splitter.flush():
+                speech.add(sentence)
+        except BaseException:
+            speech.cancel()
+            audio_sender.cancel()
+            raise
+        finally:
+            speech.close()
+
+        answer = "".join(answer_parts).strip()
+        memory.add_turn(user_query, answer)
+        await _persist(user_session)
+
+        await _send_json(user_session, websocket, {"type": "assistant", "text": answer})
+        try:
+            await audio_sender
+        except Exception as e:
+            # The text answer was delivered; only its audio is missing
+            print(f"Assistant audio error: {e}")
+            await _send_json(user_session, websocket, {
+                "type": "error",
+                "message": "Failed to send the spoken answer."
+            })
+        await _send_json(user_session, websocket, {"type": "assistant_audio_end"})
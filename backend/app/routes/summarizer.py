@@ -1,111 +1,148 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from app.services import pdf_service, gemini_service, chromadb_service, tts_service, mongodb_service
-from app.models.schemas import SummarizeResponse, QuizQuestion
-from app.services.cloudinary_services import upload_audio_to_cloudinary
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from app.services import gemini_service, mongodb_service, llm_cache, summarize_pipeline, job_service, audio_storage
+from app.models.schemas import SummarizeResponse, QuizQuestion, SummaryPage, SummaryDetail, QuizDocument
+from app.utils.pipeline import PipelineError
+from app.utils.json_response import FastJSONResponse
+from typing import List, Optional
 
 import os
+import json
+import uuid
 
 # Make sure directories exist
 os.makedirs("uploads", exist_ok=True)
-os.makedirs("audio", exist_ok=True)
 
 router = APIRouter()
 
+# Audio is stored as a relative /audio path; responses carry an absolute URL
+def _public_audio(docs, request: Request):
+    for doc in docs:
+        if doc.get("audio_path"):
+            doc["audio_path"] = audio_storage.public_url(doc["audio_path"], str(request.base_url))
+    return docs
+
+def _public_result(result: dict, request: Request):
+    if result and result.get("audio_url"):
+        return {**result, "audio_url": audio_storage.public_url(result["audio_url"], str(request.base_url))}
+    return result
+
 @router.post("/pdf", response_model=SummarizeResponse)
-async def summarize_pdf(file: UploadFile = File(...), name: str = Form(...)):
+async def summarize_pdf(request: Request, file: UploadFile = File(...), name: str = Form(...)):
     # Save uploaded file locally
     file_path = f"uploads/{file.filename}"
     with open(file_path, "wb") as f:
         f.write(await file.read())
 
-    # Base ID without extension
-    base_id = os.path.splitext(file.filename)[0]
-
-    # Extract chunks and embeddings
-    chunks = pdf_service.extract_chunks(file_path)
-    embeddings = pdf_service.get_embeddings(chunks)
-
-    # Store in ChromaDB
-    chromadb_service.store_chunks(chunks, embeddings, base_id)
-
-    # Fetch combined content
-    combined = chromadb_service.fetch_combined(base_id)
-
-    # Generate summary
-    summary = gemini_service.get_summary(combined)
-
-    # Store summary in ChromaDB
-    chromadb_service.store_summary(summary, collection_name=f"{base_id}_summary", pdf_filename=file.filename)
-
-    # Generate audio locally first
-    audio_path = f"audio/{base_id}_summary.mp3"
-    tts_service.text_to_speech_file(summary, audio_path)
-
-    # Upload to Cloudinary
-    cloudinary_url = upload_audio_to_cloudinary(audio_path)
-
-    # Store Cloudinary URL in MongoDB
-    summary_id = mongodb_service.store_summary(summary, file.filename, cloudinary_url, name)
-
-    # Generate quiz
+    # Independent stages (summary/quiz vs. embedding/indexing) run concurrently
     try:
-        quiz_data = gemini_service.get_quiz(combined)
-        print("📘 Combined input for quiz:", combined[:500])
-        print("🧠 Raw quiz:", quiz_data)
-
-        # quiz_data is already a list of dictionaries
-        quiz = [QuizQuestion(**q) for q in quiz_data]
-        
-        # Store quiz in MongoDB
-        quiz_id = mongodb_service.store_quiz(quiz_data, file.filename, summary_id, name) #send name
-        
-    except Exception as e:
-        print("⚠️ Quiz generation failed:", e)
-        quiz = []
-        quiz_id = None
+        results, timings = await summarize_pipeline.run_summarize(file_path, file.filename, name)
+    except PipelineError as e:
+        print(f"⚠️ Summarize pipeline failed at {e.stage}: {e.error}")
+        raise HTTPException(status_code=500, detail=f"Summarization failed during {e.stage}")
 
     return SummarizeResponse(
         name=name,
         score=0,
-        summary=summary,
-        audio_path=audio_path,
-        quiz=quiz,
-        summary_id=summary_id,
-        quiz_id=quiz_id
+        summary=results["summary"],
+        audio_path=audio_storage.public_url(results["upload"], str(request.base_url)),
+        quiz=[QuizQuestion(**q) for q in results["quiz"]],
+        summary_id=results["save_summary"],
+        quiz_id=results["save_quiz"],
+        timings=timings
     )
 
-@router.get("/summaries")
-async def get_summaries():
-    """Get all summaries"""
-    return mongodb_service.get_summaries()
+@router.post("/pdf/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_summarize_job(file: UploadFile = File(...), name: str = Form(...)):
+    """Queue a PDF for summarization and return a job id immediately"""
+    # Unique path so concurrent uploads of the same filename don't clobber each other
+    file_path = f"uploads/{uuid.uuid4().hex}_{file.filename}"
+    with open(file_path, "wb") as f:
+        f.write(await file.read())
+
+    job = await job_service.submit(file_path, file.filename, name)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/summarize/jobs/{job['id']}",
+        "events_url": f"/api/summarize/jobs/{job['id']}/events",
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_summarize_job(job_id: str, request: Request):
+    """Poll job status, per-stage timings and partial results"""
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**job, "result": _public_result(job["result"], request)}
+
+@router.get("/jobs/{job_id}/events")
+async def stream_summarize_job(job_id: str, request: Request):
+    """Server-sent events with stage-by-stage progress for a job"""
+    if await job_service.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for event in job_service.subscribe(job_id):
+            if "job" in event:
+                event = {**event, "job": {**event["job"], "result": _public_result(event["job"]["result"], request)}}
+            elif "result" in event:
+                event = {**event, "result": _public_result(event["result"], request)}
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-@router.get("/summaries/{summary_id}")
-async def get_summaries(summary_id: str):
+@router.get("/summaries", response_model=SummaryPage)
+async def get_summaries(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+):
+    """Get a page of summaries (newest first); pass next_cursor to get the next page"""
+    try:
+        page = await mongodb_service.get_summaries(limit=limit, cursor=cursor, name=name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _public_audio(page["items"], request)
+    return FastJSONResponse(page)
+
+@router.get("/summaries/{summary_id}", response_model=List[SummaryDetail])
+async def get_summaries(summary_id: str, request: Request):
     """Get summary by ID"""
-    return mongodb_service.get_summaries_by_id(summary_id)
+    return FastJSONResponse(_public_audio(await mongodb_service.get_summaries_by_id(summary_id), request))
 
-@router.get("/quiz/{summary_id}")
+@router.get("/quiz/{summary_id}", response_model=Optional[QuizDocument])
 async def get_quiz(summary_id: str):
     """Get quiz for a specific summary"""
-    return mongodb_service.get_quiz_by_summary_id(summary_id)
+    return FastJSONResponse(await mongodb_service.get_quiz_by_summary_id(summary_id))
 
 @router.post("/quiz/submit/{summary_id}")
 async def get_quiz(summary_id: str, score: int = Form(...)):
     """Get quiz for a specific summary"""
-    return mongodb_service.get_quiz_submit_summary_id(summary_id,score)
+    return await mongodb_service.get_quiz_submit_summary_id(summary_id,score)
 
 @router.get("/flashcards/{summary_id}")
 async def get_flashcards(summary_id: str):
     """Generate flashcards for a specific summary"""
-    summary_data = mongodb_service.get_summaries_by_id(summary_id)
+    summary_data = await mongodb_service.get_summaries_by_id(summary_id)
     if not summary_data or not summary_data[0].get("summary"):
         raise HTTPException(status_code=404, detail="Summary not found")
     
     combined = summary_data[0]["summary"]
     
     # Generate flashcards using Gemini
-    flashcards = gemini_service.get_precise_bullets(combined, num_bullets=10)
+    flashcards = await gemini_service.get_precise_bullets(combined, num_bullets=10)
     if not flashcards:
         raise HTTPException(status_code=404, detail="Flashcards generation failed")
     
-    return {"flashcards": flashcards}
\ No newline at end of file
+    return {"flashcards": flashcards}
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """LLM response cache hit/miss counters"""
+    return llm_cache.stats()
@@ -0,0 +1,130 @@
+# app/services/audio_decoder.py
+import asyncio
+import io
+import shutil
+import wave
+
+import numpy as np
+
+try:
+    import av
+except ImportError:  # optional: falls back to piping through ffmpeg
+    av = None
+
+# -----------------------------
+# In-memory audio decoding
+# -----------------------------
+# Turns uploaded/recorded clips (webm/opus, ogg, mp3, m4a, wav) into 16-bit
+# mono PCM at the recognizer's sample rate without touching disk:
+#   1. WAV is parsed with `wave` from a buffer and resampled with numpy
+#   2. everything else is decoded in-process with PyAV when it is installed
+#   3. otherwise ffmpeg is fed over stdin/stdout pipes (no temp files)
+
+TARGET_RATE = 16000
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+def _resample(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    if rate == target_rate or samples.size == 0:
+        return samples
+    duration = samples.size / rate
+    n_out = max(1, int(round(duration * target_rate)))
+    x_old = np.arange(samples.size, dtype=np.float64) / rate
+    x_new = np.arange(n_out, dtype=np.float64) / target_rate
+    return np.interp(x_new, x_old, samples.astype(np.float64))
+
+
+def _to_pcm16(samples: np.ndarray) -> bytes:
+    return np.clip(np.rint(samples), -32768, 32767).astype("<i2").tobytes()
+
+
+def _decode_wav(data: bytes, target_rate: int) -> bytes:
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wf:
+            channels, width, rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+            frames = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError) as e:
+        # Truncated or malformed RIFF header: a client error, not a server one
+        raise AudioDecodeError(f"Invalid WAV file: {e or 'truncated header'}") from e
+    if width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32)
+    elif width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 65536
+    else:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width}")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate == target_rate and channels == 1 and width == 2:
+        return frames
+    return _to_pcm16(_resample(samples, rate, target_rate))
+
+
+def _decode_av(data: bytes, target_rate: int) -> bytes:
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=target_rate)
+    out = bytearray()
+    try:
+        with av.open(io.BytesIO(data), mode="r") as container:
+            stream = next((s for s in container.streams if s.type == "audio"), None)
+            if stream is None:
+                raise AudioDecodeError("No audio stream found")
+            for frame in container.decode(stream):
+                for resampled in resampler.resample(frame):
+                    out += resampled.to_ndarray().tobytes()
+        for resampled in resampler.resample(None):  # flush
+            out += resampled.to_ndarray().tobytes()
+    except av.error.FFmpegError as e:
+        raise AudioDecodeError(f"Could not decode audio: {e}") from e
+    return bytes(out)
+
+
+def _ffmpeg_args(target_rate: int):
+    return [
+        "ffmpeg", "-loglevel", "error", "-i", "pipe:0",
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(target_rate), "-ac", "1", "pipe:1",
+    ]
+
+
+def _is_wav(data: bytes) -> bool:
+    return data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+
+
+def decode_to_pcm(data: bytes, target_rate: int = TARGET_RATE) -> bytes:
+    """Decode an audio clip to 16-bit mono PCM at target_rate (blocking)."""
+    if not data:
+        return b""
+    if _is_wav(data):
+        return _decode_wav(data, target_rate)
+    if av is not None:
+        return _decode_av(data, target_rate)
+    import subprocess
+    if shutil.which("ffmpeg") is None:
+        raise AudioDecodeError("Install PyAV (pip install av) or ffmpeg to decode compressed audio")
+    proc = subprocess.run(_ffmpeg_args(target_rate), input=data, capture_output=True)
+    if proc.returncode != 0:
+        raise AudioDecodeError(proc.stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+    return proc.stdout
+
+
+async def decode_to_pcm_async(data: bytes, target_rate: int = TARGET_RATE) -> bytes:
+    """Async variant: decodes in a worker thread, or over async pipes for ffmpeg."""
+    if not data:
+        return b""
+    if _is_wav(data) or av is not None:
+        return await asyncio.to_thread(decode_to_pcm, data, target_rate)
+    if shutil.which("ffmpeg") is None:
+        raise AudioDecodeError("Install PyAV (pip install av) or ffmpeg to decode compressed audio")
+    proc = await asyncio.create_subprocess_exec(
+        *_ffmpeg_args(target_rate),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate(data)
+    if proc.returncode != 0:
+        raise AudioDecodeError(stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+    return stdout
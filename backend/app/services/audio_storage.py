@@ -0,0 +1,140 @@
+# app/services/audio_storage.py
+import asyncio
+import hashlib
+import os
+import re
+
+from app.config import AUDIO_BACKEND, AUDIO_STORE_DIR, AUDIO_PUBLIC_BASE_URL
+
+# -----------------------------
+# Audio storage
+# -----------------------------
+# Generated speech is stored by content: key = sha256(bytes), so identical
+# audio is written once and its URL never changes (safe to cache forever).
+# save() returns a host-independent path ("/audio/<key>.mp3"), which is what
+# gets stored; routes turn it into an absolute URL with public_url().
+#
+#   local       files under AUDIO_STORE_DIR, served by GET /audio/{key}.mp3
+#               (Range, ETag, Cache-Control)
+#   cloudinary  same local copy, served the same way right away; callers that
+#               persist the URL opt in to a background upload with publish()
+#               and swap in the remote URL once it lands (chat replies don't)
+
+KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+def audio_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def path_for(key: str) -> str:
+    """Local file for a key (two-level fan-out keeps directories small)."""
+    return os.path.join(AUDIO_STORE_DIR, key[:2], f"{key}.mp3")
+
+
+def url_for(key: str) -> str:
+    return f"/audio/{key}.mp3"
+
+
+def public_url(url, base_url: str = ""):
+    """Absolute URL for a stored audio reference; remote (Cloudinary) URLs pass through."""
+    if not url or not url.startswith("/"):
+        return url
+    return f"{(AUDIO_PUBLIC_BASE_URL or base_url).rstrip('/')}{url}"
+
+
+def key_from_url(url: str):
+    match = re.search(r"/audio/([0-9a-f]{64})\.mp3$", url or "")
+    return match.group(1) if match else None
+
+
+def _write(key: str, data: bytes):
+    path = path_for(key)
+    if os.path.exists(path):
+        return  # same content already stored
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class LocalAudioStore:
+    async def save(self, data: bytes) -> str:
+        key = audio_key(data)
+        await asyncio.to_thread(_write, key, data)
+        return url_for(key)
+
+    def publish(self, url: str, callback):
+        pass  # nothing is uploaded elsewhere
+
+
+class CloudinaryAudioStore(LocalAudioStore):
+    def __init__(self):
+        self._uploads = {}  # key -> in-flight upload Task (resolves to the Cloudinary URL)
+
+    async def _upload(self, key: str):
+        from app.services.cloudinary_services import upload_audio_to_cloudinary
+        try:
+            return await asyncio.to_thread(upload_audio_to_cloudinary, path_for(key), key)
+        except Exception as e:
+            print(f"⚠️ Cloudinary upload failed for {key}: {e}")
+            return None
+
+    def publish(self, url: str, callback):
+        """Upload stored audio in the background, then await `callback(remote_url)`."""
+        key = key_from_url(url)
+        if key is None:
+            return
+        task = self._uploads.get(key)
+        if task is None:
+            # Concurrent publishes of the same audio share one upload
+            task = asyncio.create_task(self._upload(key))
+            self._uploads[key] = task
+            task.add_done_callback(lambda _: self._uploads.pop(key, None))
+
+        async def notify():
+            remote_url = await task
+            if remote_url:
+                try:
+                    await callback(remote_url)
+                except Exception as e:
+                    print(f"⚠️ Could not record Cloudinary URL: {e}")
+
+        _spawn(notify())
+
+
+_background = set()
+
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+BACKENDS = {
+    "local": LocalAudioStore,
+    "cloudinary": CloudinaryAudioStore,
+}
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if AUDIO_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown AUDIO_BACKEND '{AUDIO_BACKEND}', expected one of {sorted(BACKENDS)}")
+        _store = BACKENDS[AUDIO_BACKEND]()
+    return _store
+
+
+async def save(data: bytes) -> str:
+    """Store MP3 bytes and return a URL that can be played immediately."""
+    return await get_store().save(data)
+
+
+def publish(url: str, callback):
+    """Opt in to a remote copy of saved audio; `callback` gets the remote URL."""
+    get_store().publish(url, callback)
@@ -1,19 +1,101 @@
 import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import chromadb
-from app.config import CHROMA_API_KEY, TENANT_ID, DB_NAME
+from app.utils.chunk_utils import chunk_id
+from app.config import CHROMA_API_KEY, TENANT_ID, DB_NAME, CHROMA_BATCH_SIZE, CHROMA_UPLOAD_WORKERS
 
 # Initialize the ChromaDB client
 client = chromadb.CloudClient(api_key=CHROMA_API_KEY, tenant=TENANT_ID, database=DB_NAME)
 
-# Store chunks with embeddings
-def store_chunks(chunks, embeddings, collection_name):
+def _batch_size():
+    try:
+        return max(1, min(CHROMA_BATCH_SIZE, client.get_max_batch_size()))
+    except Exception:
+        return CHROMA_BATCH_SIZE
+
+def _source_ids(collection, source, page_size):
+    """Ids of the chunks stored for one document (not the whole collection)."""
+    ids, offset = [], 0
+    while True:
+        result = collection.get(where={"source": source}, include=[], offset=offset, limit=page_size)
+        ids += result["ids"]
+        if len(result["ids"]) < page_size:
+            return ids
+        offset += page_size
+
+# Uploads to the same collection are applied one at a time (per process), so
+# concurrent re-uploads can't interleave their deletes and upserts
+_write_locks = defaultdict(threading.Lock)
+_write_locks_guard = threading.Lock()
+
+def _write_lock(collection_name):
+    with _write_locks_guard:
+        return _write_locks[collection_name]
+
+# Store chunks with embeddings. Each chunk records its document as "source"
+# metadata, and only the delta against that document's previous version is
+# sent: new chunks are upserted (batched, in parallel) and chunks that no
+# longer appear in it are deleted. Other documents in the collection are
+# never touched.
+def store_chunks(chunks, embeddings, collection_name, source=None):
+    source = source or collection_name
+    with _write_lock(collection_name):
+        return _store_chunks(chunks, embeddings, collection_name, source)
+
+def _store_chunks(chunks, embeddings, collection_name, source):
     collection = client.get_or_create_collection(name=collection_name)
-    for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-        collection.add(
-            documents=[chunk],
-            embeddings=[embedding],
-            ids=[f"chunk-{idx}"]
-        )
+    start = time.perf_counter()
+    size = _batch_size()
+    existing = set(_source_ids(collection, source, size))
+
+    # Identical chunks map to the same id; keep the first occurrence
+    ids, docs, vectors, seen = [], [], [], set()
+    for chunk, embedding in zip(chunks, embeddings):
+        cid = chunk_id(chunk)
+        if cid in seen:
+            continue
+        seen.add(cid)
+        if cid in existing:
+            continue
+        ids.append(cid)
+        docs.append(chunk)
+        vectors.append(embedding.tolist() if hasattr(embedding, "tolist") else list(embedding))
+
+    # An empty extraction is more likely a parse failure than an empty document
+    stale = [cid for cid in existing if cid not in seen] if seen else []
+    for i in range(0, len(stale), size):
+        collection.delete(ids=stale[i:i + size])
+
+    batches = [(ids[i:i + size], docs[i:i + size], vectors[i:i + size]) for i in range(0, len(ids), size)]
+
+    def upsert(batch):
+        batch_ids, batch_docs, batch_vectors = batch
+        collection.upsert(ids=batch_ids, documents=batch_docs, embeddings=batch_vectors,
+                          metadatas=[{"source": source}] * len(batch_ids))
+
+    if len(batches) <= 1 or CHROMA_UPLOAD_WORKERS <= 1:
+        for batch in batches:
+            upsert(batch)
+    else:
+        with ThreadPoolExecutor(max_workers=min(CHROMA_UPLOAD_WORKERS, len(batches))) as pool:
+            list(pool.map(upsert, batches))
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "added": len(ids),
+        "deleted": len(stale),
+        "unchanged": len(seen) - len(ids),
+        "duplicates_skipped": len(chunks) - len(seen),
+        "batches": len(batches),
+        "batch_size": size,
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(len(ids) / elapsed, 1) if elapsed > 0 else None,
+    }
+    print(f"📦 Indexed into '{collection_name}': {stats}")
+    return stats
 
 # Fetch all documents from a collection and combine them
 def fetch_combined(collection_name):
@@ -34,7 +116,7 @@ def store_summary(summary_text, collection_name, pdf_filename):
     doc_id = os.path.splitext(os.path.basename(pdf_filename))[0] + "_summary"
 
     collection = client.get_or_create_collection(name=collection_name)
-    collection.add(
+    collection.upsert(
         documents=[summary_text],
         ids=[doc_id]
     )
@@ -0,0 +1,126 @@
+# app/services/conversation_memory.py
+import asyncio
+from collections import deque
+
+from app.config import MEMORY_RECENT_TURNS, MEMORY_TOKEN_BUDGET, MEMORY_HISTORY_TOKENS
+from app.services import gemini_service
+from app.utils.chunk_utils import count_tokens, normalize_whitespace, truncate_tokens
+
+# -----------------------------
+# Token-budgeted conversation memory
+# -----------------------------
+# One instance per realtime session. The last MEMORY_RECENT_TURNS exchanges
+# are kept verbatim; older ones are folded into a running summary by a
+# background Gemini call, so answering never waits on it (if that call fails
+# the turns stay pending and are retried after the next turn). build_context()
+# lays out summary + recent turns + this turn's retrieved passages (deduped)
+# within MEMORY_TOKEN_BUDGET, so prompt size stays flat however long the
+# session runs.
+
+
+class ConversationMemory:
+    def __init__(self, recent_turns=MEMORY_RECENT_TURNS, token_budget=MEMORY_TOKEN_BUDGET,
+                 history_tokens=MEMORY_HISTORY_TOKENS, on_update=None):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.history_tokens = min(history_tokens, token_budget)
+        self.summary = ""
+        self.turns = deque()   # (user, assistant)
+        self._pending = []     # turns waiting to be summarized
+        self._summarizer = None
+        self.on_update = on_update  # async callback, e.g. persist to the session store
+
+    def to_dict(self) -> dict:
+        """Serializable state; pending turns are included so another worker can finish them."""
+        return {"summary": self.summary, "turns": list(self.turns), "pending": list(self._pending)}
+
+    @classmethod
+    def from_dict(cls, data: dict, **kwargs):
+        memory = cls(**kwargs)
+        memory.summary = data.get("summary", "")
+        memory.turns.extend(tuple(turn) for turn in data.get("turns", []))
+        memory._pending = [tuple(turn) for turn in data.get("pending", [])]
+        return memory
+
+    def add_turn(self, user: str, assistant: str):
+        self.turns.append((user, assistant))
+        while len(self.turns) > self.recent_turns:
+            self._pending.append(self.turns.popleft())
+        self.start_summarizing()
+
+    def start_summarizing(self):
+        """Fold pending turns into the summary in the background."""
+        if self._pending and self._summarizer is None:
+            self._summarizer = asyncio.create_task(self._summarize())
+
+    async def _summarize(self):
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    self.summary = await gemini_service.get_conversation_summary(
+                        self.summary, _format_turns(batch)
+                    )
+                except asyncio.CancelledError:
+                    self._pending = batch + self._pending  # still saved with the session
+                    raise
+                except Exception as e:
+                    # Keep the old summary and the turns, oldest first; the
+                    # next add_turn() retries them
+                    print(f"⚠️ Conversation summary failed: {e}")
+                    self._pending = batch + self._pending
+                    break
+                if self.on_update is not None:
+                    await self.on_update()
+        finally:
+            self._summarizer = None
+
+    def build_context(self, passages) -> str:
+        """Prompt context for the next answer, at most token_budget tokens."""
+        sections = []
+        used = 0
+
+        summary = truncate_tokens(self.summary, self.history_tokens // 2)
+        if summary:
+            sections.append(f"Conversation so far (summary):\n{summary}")
+            used += count_tokens(summary)
+
+        # Newest turns first until the history budget is spent
+        recent = []
+        for user, assistant in reversed(self.turns):
+            turn = _format_turns([(user, assistant)])
+            size = count_tokens(turn)
+            if used + size > self.history_tokens:
+                if not recent:  # always keep (the start of) the last exchange
+                    recent.append(truncate_tokens(turn, self.history_tokens - used))
+                    used += count_tokens(recent[-1])
+                break
+            recent.append(turn)
+            used += size
+        if recent:
+            sections.append("Recent conversation:\n" + "\n".join(reversed(recent)))
+
+        material, seen = [], set()
+        for passage in passages:
+            key = normalize_whitespace(passage).lower()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            remaining = self.token_budget - used
+            if remaining <= 0:
+                break
+            passage = truncate_tokens(passage, remaining)
+            material.append(passage)
+            used += count_tokens(passage)
+        if material:
+            sections.append("Course material:\n" + "\n\n".join(material))
+
+        return "\n\n".join(sections)
+
+    def close(self):
+        if self._summarizer is not None:
+            self._summarizer.cancel()
+
+
+def _format_turns(turns) -> str:
+    return "\n".join(f"Student: {user}\nAssistant: {assistant}" for user, assistant in turns)
@@ -0,0 +1,69 @@
+# app/services/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from app.config import EMBEDDING_CACHE_PATH
+from app.utils.chunk_utils import normalize_whitespace
+
+# -----------------------------
+# Persistent chunk embedding cache
+# -----------------------------
+# Key: sha256(model id + normalized chunk text). Value: float32 vector bytes.
+# Re-uploading a lightly edited PDF only encodes the chunks that changed.
+
+_lock = threading.Lock()
+_conn = None
+
+
+def make_key(model_id: str, text: str) -> str:
+    return hashlib.sha256(f"{model_id}\0{normalize_whitespace(text)}".encode("utf-8")).hexdigest()
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        directory = os.path.dirname(EMBEDDING_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _conn = sqlite3.connect(EMBEDDING_CACHE_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+        )
+        _conn.commit()
+    return _conn
+
+
+def get_many(keys):
+    """Return {key: np.ndarray} for the keys that are cached."""
+    found = {}
+    unique = list(dict.fromkeys(keys))
+    with _lock:
+        conn = _get_conn()
+        # Stay well under sqlite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            for key, dim, blob in conn.execute(
+                f"SELECT key, dim, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ):
+                found[key] = np.frombuffer(blob, dtype=np.float32, count=dim)
+    return found
+
+
+def put_many(items):
+    """Store an iterable of (key, vector) pairs."""
+    rows = []
+    for key, vector in items:
+        vec = np.asarray(vector, dtype=np.float32)
+        rows.append((key, int(vec.shape[0]), vec.tobytes()))
+    if not rows:
+        return
+    with _lock:
+        conn = _get_conn()
+        conn.executemany("INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)", rows)
+        conn.commit()
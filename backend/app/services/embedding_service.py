@@ -0,0 +1,228 @@
+# app/services/embedding_service.py
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from app.config import EMBEDDING_MODEL, EMBED_WORKERS, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS
+from app.services import model_registry
+
+# -----------------------------
+# Cross-request micro-batching encoder
+# -----------------------------
+# Callers await encode(texts). Requests from every caller are queued and
+# grouped into one batch until either EMBED_MAX_BATCH texts are waiting or the
+# oldest request has waited EMBED_MAX_WAIT_MS. Batches run in a process pool
+# (each worker holds its own model), so encoding never blocks the event loop.
+# With EMBED_WORKERS=0 batches run in a thread against the in-process model.
+# With a pool, the parent never loads the model: the registry entry
+# "embedding_pool" starts and warms the workers, and drives /health/ready.
+
+_worker_model = None
+
+
+def _init_worker():
+    """Pool initializer: every worker loads and warms the model when it spawns,
+    before it takes any task."""
+    global _worker_model
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(EMBEDDING_MODEL)
+    _worker_model.encode(["warmup"], show_progress_bar=False)
+
+
+def _worker_ready():
+    return _worker_model is not None
+
+
+def _encode_in_worker(texts):
+    """Runs inside a pool process (model loaded by _init_worker)."""
+    return _worker_model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+
+def _encode_in_process(texts):
+    from app.services import pdf_service
+    return pdf_service.get_model().encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_queue = None
+_batcher = None
+_inflight = set()  # strong refs to running batch tasks
+_stats = {"requests": 0, "texts": 0, "batches": 0, "max_batch_seen": 0, "encode_seconds": 0.0}
+
+
+def _get_pool():
+    """The encoder process pool, or None when EMBED_WORKERS=0."""
+    global _pool
+    if EMBED_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a parent that already imported torch is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=EMBED_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def _warm_pool(pool):
+    """
+    Spawn every worker and wait until they are warm (blocking; run by the
+    model registry). Submitting EMBED_WORKERS tasks at once starts that many
+    processes, and each one runs _init_worker before its first task, so when
+    these return no worker is cold, whichever ones ran the tasks.
+    """
+    futures = [pool.submit(_worker_ready) for _ in range(EMBED_WORKERS)]
+    try:
+        for future in futures:
+            future.result()
+    except BrokenProcessPool:
+        # A worker's initializer failed (e.g. model download): drop the pool
+        # so the registry's retry starts a fresh one
+        _discard_pool(pool)
+        raise
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+if EMBED_WORKERS > 0:
+    model_registry.register("embedding_pool", _get_pool, _warm_pool)
+
+
+def start():
+    """Start the batching loop (idempotent); the pool starts on first use."""
+    global _queue, _batcher
+    if _batcher is not None:
+        return
+    _queue = asyncio.Queue()
+    _batcher = asyncio.create_task(_batch_loop())
+
+
+async def stop():
+    global _pool, _queue, _batcher
+    if _batcher is not None:
+        _batcher.cancel()
+        await asyncio.gather(_batcher, return_exceptions=True)
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    _queue, _batcher = None, None
+
+
+def encode_blocking(texts) -> np.ndarray:
+    """Synchronous encode for non-async callers; uses the pool when there is one."""
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            return np.asarray(pool.submit(_encode_in_worker, texts).result(), dtype=np.float32)
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise
+    return np.asarray(_encode_in_process(texts), dtype=np.float32)
+
+
+async def encode(texts) -> np.ndarray:
+    """Embed texts; large inputs are split into max-batch pieces."""
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    start()
+    loop = asyncio.get_running_loop()
+    futures = []
+    for i in range(0, len(texts), EMBED_MAX_BATCH):
+        future = loop.create_future()
+        _queue.put_nowait((texts[i:i + EMBED_MAX_BATCH], future, time.perf_counter()))
+        futures.append(future)
+    _stats["requests"] += 1
+    parts = await asyncio.gather(*futures)
+    return np.vstack(parts)
+
+
+async def _batch_loop():
+    loop = asyncio.get_running_loop()
+    max_wait = EMBED_MAX_WAIT_MS / 1000
+    while True:
+        first = await _queue.get()
+        batch = [first]
+        count = len(first[0])
+        deadline = first[2] + max_wait
+        while count < EMBED_MAX_BATCH:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if count + len(item[0]) > EMBED_MAX_BATCH:
+                # Doesn't fit in this batch: send it on its own
+                _spawn(_run_batch(loop, [item]))
+                break
+            batch.append(item)
+            count += len(item[0])
+        # Fire and continue collecting; the pool bounds actual parallelism
+        _spawn(_run_batch(loop, batch))
+
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _inflight.add(task)
+    task.add_done_callback(_inflight.discard)
+
+
+async def _run_batch(loop, batch):
+    texts = [text for item in batch for text in item[0]]
+    t0 = time.perf_counter()
+    pool = _get_pool()
+    try:
+        if pool is not None:
+            vectors = await loop.run_in_executor(pool, _encode_in_worker, texts)
+        else:
+            vectors = await asyncio.to_thread(_encode_in_process, texts)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            _discard_pool(pool)  # the next batch starts a fresh pool
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    _stats["batches"] += 1
+    _stats["texts"] += len(texts)
+    _stats["max_batch_seen"] = max(_stats["max_batch_seen"], len(texts))
+    _stats["encode_seconds"] += time.perf_counter() - t0
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    offset = 0
+    for item_texts, future, _ in batch:
+        n = len(item_texts)
+        if not future.done():
+            future.set_result(vectors[offset:offset + n])
+        offset += n
+
+
+def stats() -> dict:
+    batches = _stats["batches"]
+    return {
+        **_stats,
+        "encode_seconds": round(_stats["encode_seconds"], 3),
+        "avg_batch_size": round(_stats["texts"] / batches, 2) if batches else 0.0,
+        "queue_depth": _queue.qsize() if _queue is not None else 0,
+        "workers": EMBED_WORKERS,
+    }
@@ -2,8 +2,74 @@ import os
 import json
 import random
 import string
-import requests
-from app.config import GEMINI_API_KEY
+import asyncio
+import httpx
+from app.services import llm_cache
+from app.utils.chunk_utils import count_tokens
+from app.config import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_TIMEOUT,
+    GEMINI_MAX_CONNECTIONS,
+    GEMINI_MAX_KEEPALIVE,
+    SUMMARY_MAP_THRESHOLD_TOKENS,
+    SUMMARY_GROUP_TOKENS,
+    SUMMARY_MAP_CONCURRENCY,
+)
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+
+# Shared async HTTP client, opened on app startup and closed on shutdown
+_client = None
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared pooled client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=GEMINI_BASE_URL,
+            http2=_http2_available(),
+            timeout=httpx.Timeout(GEMINI_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=GEMINI_MAX_CONNECTIONS,
+                max_keepalive_connections=GEMINI_MAX_KEEPALIVE,
+                keepalive_expiry=30.0,
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+    return _client
+
+async def start_client():
+    """Open the shared client (called from the app startup hook)."""
+    get_client()
+
+async def close_client():
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def _generate(payload: dict, error_prefix: str) -> dict:
+    """POST a generateContent request over the shared client."""
+    res = await get_client().post(
+        f"/{GEMINI_MODEL}:generateContent",
+        params={"key": GEMINI_API_KEY},
+        json=payload,
+    )
+    if res.status_code == 200:
+        return res.json()
+    raise Exception(f"{error_prefix}: {res.text}")
+
+def _candidate_text(data: dict) -> str:
+    return data["candidates"][0]["content"]["parts"][0]["text"]
 
 # Helper: randomness for unique quizzes
 def random_tag(length: int = 6) -> str:
@@ -27,10 +93,7 @@ def safe_json_parse(text: str, fallback=None):
         return fallback if fallback is not None else []
 
 #  Summary function (deterministic)
-def get_summary(text: str) -> str:
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-lite:generateContent?key={GEMINI_API_KEY}"
-
-    prompt = f"""
+SUMMARY_PROMPT = """
     Summarize the following technical content into 4–6 bullet points or short paragraphs. 
     Make it concise and easy to understand for students.
 
@@ -38,19 +101,83 @@ def get_summary(text: str) -> str:
     {text}
     """
 
-    payload = {"contents": [{"parts": [{"text": prompt}]}]}
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(url, headers=headers, json=payload)
+async def get_summary(text: str) -> str:
+    key = llm_cache.make_key(GEMINI_MODEL, SUMMARY_PROMPT, {}, text=text)
+
+    async def generate():
+        prompt = SUMMARY_PROMPT.format(text=text)
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        data = await _generate(payload, "Gemini API Error")
+        return _candidate_text(data)
 
-    if response.status_code == 200:
-        data = response.json()
-        return data["candidates"][0]["content"]["parts"][0]["text"]
-    else:
-        raise Exception(f"Gemini API Error: {response.text}")
+    return await llm_cache.cached(key, generate)
+
+# --- Map-reduce summarization for large documents ---
+PARTIAL_SUMMARY_PROMPT = """
+    Summarize this section of a larger technical document into concise key points for students.
+    Keep definitions, formulas, algorithms and important facts. Do not add an introduction.
+
+    Section:
+    {text}
+    """
+
+async def _get_partial_summary(text: str) -> str:
+    key = llm_cache.make_key(GEMINI_MODEL, PARTIAL_SUMMARY_PROMPT, {}, text=text)
+
+    async def generate():
+        prompt = PARTIAL_SUMMARY_PROMPT.format(text=text)
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        data = await _generate(payload, "Gemini API Error (partial summary)")
+        return _candidate_text(data).strip()
+
+    return await llm_cache.cached(key, generate)
+
+def _group_by_tokens(texts: list, budget: int) -> list:
+    """Greedily pack consecutive texts into groups of at most `budget` tokens.
+    A group always takes at least two texts when available so every reduce
+    round shrinks the list."""
+    groups, current, size = [], [], 0
+    for text in texts:
+        n = count_tokens(text)
+        if current and size + n > budget and len(current) >= 2:
+            groups.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += n
+    if current:
+        groups.append(current)
+    return groups
+
+async def get_partial_summaries(texts: list) -> list:
+    """
+    Map step over groups of consecutive texts, then reduce partial summaries
+    recursively until they fit in one prompt. Pass non-overlapping text (e.g.
+    pages), not retrieval chunks, or the overlap is summarized twice. Returns
+    the final level of partial summaries; small documents come back unchanged
+    as a single joined text.
+    """
+    combined = "\n\n".join(texts)
+    if count_tokens(combined) <= SUMMARY_MAP_THRESHOLD_TOKENS:
+        return [combined]
+
+    semaphore = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+
+    async def summarize(group):
+        async with semaphore:
+            return await _get_partial_summary("\n\n".join(group))
+
+    level, rounds = list(texts), 0
+    while True:
+        groups = _group_by_tokens(level, SUMMARY_GROUP_TOKENS)
+        level = list(await asyncio.gather(*(summarize(g) for g in groups)))
+        rounds += 1
+        if len(level) == 1 or count_tokens("\n\n".join(level)) <= SUMMARY_GROUP_TOKENS:
+            break
+    print(f"🗂️ Map-reduce summary: {len(texts)} texts -> {len(level)} partials in {rounds} round(s)")
+    return level
 
 #  Quiz function (always unique)
-def get_quiz(summary: str) -> list:
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-lite:generateContent?key={GEMINI_API_KEY}"
+async def get_quiz(summary: str) -> list:
     unique_tag = random_tag()
 
     prompt = f"""
@@ -82,36 +209,27 @@ def get_quiz(summary: str) -> list:
         }
     }
 
-    headers = {"Content-Type": "application/json"}
-    res = requests.post(url, headers=headers, json=payload)
+    response_data = await _generate(payload, "Gemini Quiz API failed")
+    text = _candidate_text(response_data).strip()
 
-    if res.status_code == 200:
-        response_data = res.json()
-        text = response_data['candidates'][0]['content']['parts'][0]['text'].strip()
-
-        # Remove wrappers
-        if text.startswith("```"):
-            start_idx = text.find("[")
-            end_idx = text.rfind("]") + 1
-            text = text[start_idx:end_idx]
+    # Remove wrappers
+    if text.startswith("```"):
+        start_idx = text.find("[")
+        end_idx = text.rfind("]") + 1
+        text = text[start_idx:end_idx]
 
-        # ✅ Use safe_json_parse
-        quiz_json = safe_json_parse(text, fallback=[
-            {
-                "question": "Fallback Question?",
-                "options": ["Option A", "Option B", "Option C", "Option D"],
-                "answer": "Option A"
-            }
-        ])
-        return quiz_json
-    else:
-        raise Exception(f"Gemini Quiz API failed: {res.text}")
+    # ✅ Use safe_json_parse
+    quiz_json = safe_json_parse(text, fallback=[
+        {
+            "question": "Fallback Question?",
+            "options": ["Option A", "Option B", "Option C", "Option D"],
+            "answer": "Option A"
+        }
+    ])
+    return quiz_json
 
 # Precise bullet summary for flashcards
-def get_precise_bullets(text: str, num_bullets: int = 10) -> list:
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-lite:generateContent?key={GEMINI_API_KEY}"
-
-    prompt = f"""
+BULLETS_PROMPT = """
     Summarize the following into precise, important, technical points for students. 
     Each point should be concise and suitable for a flashcard. 
     Output STRICT JSON as an array of strings (no markdown, no extra text). 
@@ -121,39 +239,39 @@ def get_precise_bullets(text: str, num_bullets: int = 10) -> list:
     {text}
     """
 
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {
-            "temperature": 0.7,
-            "topP": 0.9,
-            "topK": 40,
-            "maxOutputTokens": 512
-        }
-    }
-    headers = {"Content-Type": "application/json"}
-    response = requests.post(url, headers=headers, json=payload)
+BULLETS_CONFIG = {
+    "temperature": 0.7,
+    "topP": 0.9,
+    "topK": 40,
+    "maxOutputTokens": 512
+}
 
-    if response.status_code == 200:
-        data = response.json()
-        text = data["candidates"][0]["content"]["parts"][0]["text"].strip()
+async def get_precise_bullets(text: str, num_bullets: int = 10) -> list:
+    key = llm_cache.make_key(
+        GEMINI_MODEL, BULLETS_PROMPT, BULLETS_CONFIG, text=text, num_bullets=num_bullets
+    )
+
+    async def generate():
+        prompt = BULLETS_PROMPT.format(text=text, num_bullets=num_bullets)
+        payload = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": BULLETS_CONFIG
+        }
+        data = await _generate(payload, "Gemini API Error")
+        raw = _candidate_text(data).strip()
 
-        if text.startswith("```"):
-            start_idx = text.find("[")
-            end_idx = text.rfind("]") + 1
-            text = text[start_idx:end_idx]
+        if raw.startswith("```"):
+            start_idx = raw.find("[")
+            end_idx = raw.rfind("]") + 1
+            raw = raw[start_idx:end_idx]
 
         # ✅ Use safe_json_parse
-        bullets = safe_json_parse(text, fallback=[])
-        return bullets
-    else:
-        raise Exception(f"Gemini API Error: {response.text}")
+        return safe_json_parse(raw, fallback=[])
 
-def get_answer(query: str, context: str) -> str:
-    """
-    Generates an answer using Gemini API given a user query and context.
-    """
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-lite:generateContent?key={GEMINI_API_KEY}"
-    prompt = f"""
+    # Empty lists are parse failures, so don't cache them
+    return await llm_cache.cached(key, generate)
+
+ANSWER_PROMPT = """
     You are an AI assistant. Answer the following question based on the provided context.
 
     Context:
@@ -165,12 +283,55 @@ def get_answer(query: str, context: str) -> str:
     Provide a concise, clear, and informative answer.
     """
 
+async def get_answer(query: str, context: str) -> str:
+    """
+    Generates an answer using Gemini API given a user query and context.
+    """
+    prompt = ANSWER_PROMPT.format(context=context, query=query)
     payload = {"contents": [{"parts": [{"text": prompt}]}]}
-    headers = {"Content-Type": "application/json"}
+    data = await _generate(payload, "Gemini API failed (answer)")
+    return _candidate_text(data).strip()
 
-    res = requests.post(url, headers=headers, json=payload)
-    if res.status_code == 200:
-        return res.json()['candidates'][0]['content']['parts'][0]['text'].strip()
-    else:
-        raise Exception(f"Gemini API failed (answer): {res.text}")
+async def stream_answer(query: str, context: str):
+    """
+    Streaming variant of get_answer: yields text deltas as Gemini produces them
+    (streamGenerateContent over server-sent events).
+    """
+    prompt = ANSWER_PROMPT.format(context=context, query=query)
+    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    async with get_client().stream(
+        "POST",
+        f"/{GEMINI_MODEL}:streamGenerateContent",
+        params={"key": GEMINI_API_KEY, "alt": "sse"},
+        json=payload,
+    ) as res:
+        if res.status_code != 200:
+            body = await res.aread()
+            raise Exception(f"Gemini API failed (stream answer): {body.decode(errors='replace')}")
+        async for line in res.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = json.loads(line[len("data:"):].strip())
+            for candidate in data.get("candidates", []):
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
+
+# --- Rolling conversation summary for long voice sessions ---
+CONVERSATION_SUMMARY_PROMPT = """
+    You maintain a running summary of a tutoring conversation between a student and an assistant.
+    Update the summary with the new exchanges. Keep the topics covered, the student's questions,
+    key facts from the answers and anything the student found confusing. At most 120 words.
+
+    Current summary:
+    {summary}
 
+    New exchanges:
+    {turns}
+    """
+
+async def get_conversation_summary(summary: str, turns: str) -> str:
+    prompt = CONVERSATION_SUMMARY_PROMPT.format(summary=summary or "(none)", turns=turns)
+    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    data = await _generate(payload, "Gemini API failed (conversation summary)")
+    return _candidate_text(data).strip()
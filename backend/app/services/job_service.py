@@ -0,0 +1,270 @@
+# app/services/job_service.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.config import JOB_BACKEND, JOB_DB_PATH, JOB_WORKERS, JOB_RESULT_TTL
+from app.services import summarize_pipeline
+from app.utils.pipeline import PipelineError
+
+# -----------------------------
+# Background summarize jobs
+# -----------------------------
+# A job moves queued -> running -> done | failed. As pipeline stages finish
+# their user-facing output is copied into job["result"] and pushed to any
+# subscribers, so clients see the summary first, then quiz, then audio URL.
+
+TERMINAL = {"done", "failed"}
+
+# Pipeline stage -> field in job["result"] that receives its output
+PUBLISHED_STAGES = {
+    "summary": "summary",
+    "quiz": "quiz",
+    "upload": "audio_url",
+    "save_summary": "summary_id",
+    "save_quiz": "quiz_id",
+}
+
+
+class MemoryJobStore:
+    """Jobs live only in this process; lost on restart. Finished jobs expire after ttl."""
+
+    def __init__(self, ttl: int = JOB_RESULT_TTL):
+        self.ttl = ttl
+        self._jobs = {}
+
+    def _evict(self):
+        cutoff = time.time() - self.ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in TERMINAL and job.get("updated_at", 0) < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def save(self, job: dict):
+        self._evict()
+        self._jobs[job["id"]] = job
+
+    def get(self, job_id: str):
+        self._evict()
+        return self._jobs.get(job_id)
+
+    def unfinished(self):
+        return []
+
+
+class SqliteJobStore:
+    """
+    Jobs persisted to sqlite so queued/running work survives a restart.
+    Finished jobs are deleted ttl seconds after they finish (checked on save,
+    at most every PRUNE_INTERVAL seconds).
+    """
+
+    PRUNE_INTERVAL = 60
+
+    def __init__(self, path: str, ttl: int = JOB_RESULT_TTL):
+        self.ttl = ttl
+        self._last_prune = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+            "data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs(updated_at)")
+        self._conn.commit()
+
+    def _prune(self, now: float):
+        if now - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (now - self.ttl,)
+        )
+
+    def save(self, job: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, data, updated_at) VALUES (?, ?, ?, ?)",
+                (job["id"], job["status"], json.dumps(job, default=str), now),
+            )
+            self._prune(now)
+            self._conn.commit()
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def unfinished(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM jobs WHERE status IN ('queued', 'running') ORDER BY updated_at"
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+store = SqliteJobStore(JOB_DB_PATH) if JOB_BACKEND == "sqlite" else MemoryJobStore()
+
+_queue = None
+_workers = []
+_subscribers = {}  # job_id -> set of asyncio.Queue
+
+
+def _public(job: dict) -> dict:
+    """Job view returned to clients (hides local file paths)."""
+    return {k: v for k, v in job.items() if k != "params"}
+
+
+async def _save(job: dict):
+    job["updated_at"] = time.time()
+    await asyncio.to_thread(store.save, job)
+
+
+def _remove_upload(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"⚠️ Could not remove job upload {path}: {e}")
+
+
+def _publish(job_id: str, event: dict):
+    for q in _subscribers.get(job_id, ()):
+        q.put_nowait(event)
+
+
+async def submit(file_path: str, filename: str, name: str) -> dict:
+    """Create a job for an already-saved PDF and queue it."""
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "filename": filename,
+        "name": name,
+        "stages": {},
+        "result": {},
+        "error": None,
+        "created_at": time.time(),
+        "params": {"file_path": file_path, "filename": filename, "name": name},
+    }
+    await _save(job)
+    _queue.put_nowait(job["id"])
+    return _public(job)
+
+
+async def get(job_id: str):
+    job = await asyncio.to_thread(store.get, job_id)
+    return _public(job) if job else None
+
+
+async def subscribe(job_id: str):
+    """Async generator of progress events; ends once the job is finished."""
+    q = asyncio.Queue()
+    _subscribers.setdefault(job_id, set()).add(q)
+    try:
+        job = await get(job_id)
+        if job is None:
+            return
+        yield {"type": "snapshot", "job": job}
+        if job["status"] in TERMINAL:
+            return
+        while True:
+            event = await q.get()
+            yield event
+            if event["type"] == "status" and event["status"] in TERMINAL:
+                return
+    finally:
+        _subscribers[job_id].discard(q)
+        if not _subscribers[job_id]:
+            _subscribers.pop(job_id, None)
+
+
+async def _run(job_id: str):
+    job = await asyncio.to_thread(store.get, job_id)
+    if job is None or job["status"] in TERMINAL:
+        return
+
+    job["status"] = "running"
+    await _save(job)
+    _publish(job_id, {"type": "status", "status": "running"})
+
+    async def on_stage_done(stage, value, timing):
+        job["stages"][stage] = timing
+        event = {"type": "stage", "stage": stage, **timing}
+        field = PUBLISHED_STAGES.get(stage)
+        if field:
+            job["result"][field] = value
+            event["result"] = {field: value}
+        await _save(job)
+        _publish(job_id, event)
+
+    # Resuming after a restart: reuse outputs already recorded for this job
+    recorded = {stage: job["result"][field] for stage, field in PUBLISHED_STAGES.items() if field in job["result"]}
+    if recorded:
+        print(f"🔁 Resuming job {job_id}, skipping {sorted(recorded)}")
+
+    params = job["params"]
+    try:
+        _, timings = await summarize_pipeline.run_summarize(
+            params["file_path"], params["filename"], params["name"], on_stage_done,
+            job_id=job_id, recorded=recorded,
+        )
+        job["status"] = "done"
+        job["stages"]["total"] = timings["total"]
+    except PipelineError as e:
+        print(f"⚠️ Job {job_id} failed at {e.stage}: {e.error}")
+        job["status"] = "failed"
+        job["error"] = f"{e.stage}: {e.error}"
+    except Exception as e:
+        print(f"⚠️ Job {job_id} failed: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+
+    await _save(job)
+    _publish(job_id, {"type": "status", "status": job["status"], "error": job["error"]})
+    # Finished jobs are never resumed, so the uploaded PDF is no longer needed
+    await asyncio.to_thread(_remove_upload, params["file_path"])
+
+
+async def _worker():
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _run(job_id)
+        except Exception as e:
+            print(f"⚠️ Job worker error on {job_id}: {e}")
+        finally:
+            _queue.task_done()
+
+
+async def start():
+    """Start the worker pool and re-queue unfinished persisted jobs."""
+    global _queue
+    if _workers:
+        return
+    _queue = asyncio.Queue()
+    for job in await asyncio.to_thread(store.unfinished):
+        job["status"] = "queued"
+        await _save(job)
+        _queue.put_nowait(job["id"])
+    for _ in range(JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,184 @@
+# app/services/llm_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import (
+    LLM_CACHE_PATH,
+    LLM_CACHE_MEMORY_ITEMS,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_BYTES,
+)
+
+# -----------------------------
+# Content-addressed cache for deterministic Gemini calls
+# -----------------------------
+# Tier 1: bounded in-memory LRU (values kept as JSON text, so every hit
+#         decodes a fresh copy and callers can't mutate the cached value)
+# Tier 2: sqlite file with TTL and total-size eviction
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+_db_lock = threading.Lock()
+_conn = None
+
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+def make_key(model: str, template: str, config: dict, **inputs) -> str:
+    """Hash everything that determines the model output into a cache key."""
+    material = json.dumps(
+        {"model": model, "template": template, "config": config or {}, "inputs": inputs},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        directory = os.path.dirname(LLM_CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        _conn.commit()
+    return _conn
+
+def _memory_get(key):
+    with _memory_lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return True, _memory[key]
+    return False, None
+
+def _memory_put(key, encoded: str):
+    with _memory_lock:
+        _memory[key] = encoded
+        _memory.move_to_end(key)
+        while len(_memory) > LLM_CACHE_MEMORY_ITEMS:
+            _memory.popitem(last=False)
+
+def _disk_get(key):
+    now = time.time()
+    with _db_lock:
+        conn = _get_conn()
+        row = conn.execute(
+            "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        value, created_at = row
+        if LLM_CACHE_TTL and now - created_at > LLM_CACHE_TTL:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+            _stats["evictions"] += 1
+            return False, None
+        conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+    return True, value
+
+def _disk_put(key, encoded: str):
+    now = time.time()
+    with _db_lock:
+        conn = _get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, encoded, len(encoded), now, now),
+        )
+        _evict(conn, now)
+        conn.commit()
+
+def _evict(conn, now):
+    """Drop expired rows, then least-recently-used rows until under the size cap."""
+    if LLM_CACHE_TTL:
+        cur = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - LLM_CACHE_TTL,))
+        _stats["evictions"] += cur.rowcount
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    if total <= LLM_CACHE_MAX_BYTES:
+        return
+    for key, size in conn.execute(
+        "SELECT key, size FROM llm_cache ORDER BY accessed_at ASC"
+    ).fetchall():
+        if total <= LLM_CACHE_MAX_BYTES:
+            break
+        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        total -= size
+        _stats["evictions"] += 1
+
+async def get(key):
+    """Look a key up in memory, then on disk. Returns (hit, value)."""
+    hit, encoded = _memory_get(key)
+    if hit:
+        _stats["memory_hits"] += 1
+        return True, json.loads(encoded)
+    hit, encoded = await asyncio.to_thread(_disk_get, key)
+    if hit:
+        _stats["disk_hits"] += 1
+        _memory_put(key, encoded)
+        return True, json.loads(encoded)
+    _stats["misses"] += 1
+    return False, None
+
+async def put(key, value):
+    """Store a JSON-serializable value in both tiers."""
+    encoded = json.dumps(value, ensure_ascii=False)
+    _memory_put(key, encoded)
+    _stats["stores"] += 1
+    try:
+        await asyncio.to_thread(_disk_put, key, encoded)
+    except sqlite3.Error as e:
+        print(f"⚠️ LLM cache write failed: {e}")
+
+async def cached(key, producer, should_store=bool):
+    """Return the cached value for key, or await producer() and cache the result."""
+    try:
+        hit, value = await get(key)
+    except sqlite3.Error as e:
+        print(f"⚠️ LLM cache read failed: {e}")
+        hit, value = False, None
+    if hit:
+        return value
+    value = await producer()
+    if should_store(value):
+        await put(key, value)
+    return value
+
+def stats() -> dict:
+    """Hit/miss counters plus current tier sizes."""
+    with _memory_lock:
+        memory_items = len(_memory)
+    lookups = _stats["memory_hits"] + _stats["disk_hits"] + _stats["misses"]
+    hits = _stats["memory_hits"] + _stats["disk_hits"]
+    return {
+        **_stats,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "memory_items": memory_items,
+        "memory_capacity": LLM_CACHE_MEMORY_ITEMS,
+    }
+
+def clear():
+    """Empty both tiers (counters are kept)."""
+    with _memory_lock:
+        _memory.clear()
+    with _db_lock:
+        conn = _get_conn()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
@@ -0,0 +1,272 @@
+# app/services/local_vector_store.py
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from app.config import VECTOR_STORE_DIR, LOCAL_ANN_THRESHOLD
+from app.utils.chunk_utils import chunk_id
+
+try:
+    import hnswlib
+except ImportError:  # optional: brute force is used for every collection
+    hnswlib = None
+
+# -----------------------------
+# Embedded vector store
+# -----------------------------
+# Each collection is a directory holding:
+#   vectors.npy  float32 matrix of L2-normalized embeddings (memory-mapped on load)
+#   docs.json    ids, documents and sources (the document a chunk came
+#                from), row-aligned with the matrix
+#   hnsw.bin     optional approximate index for large collections
+# Queries are a single matrix-vector product (cosine similarity) unless the
+# collection is big enough to use the HNSW index.
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _write_atomic(path: str, write):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+# Collection names come from upload filenames and the websocket; anything
+# that is not a plain name gets a hashed directory ("~" never matches SAFE_NAME)
+SAFE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def _dir_name(name: str) -> str:
+    if SAFE_NAME.match(name):
+        return name
+    return "~" + hashlib.sha256(name.encode("utf-8")).hexdigest()[:32]
+
+
+class _Collection:
+    """
+    Writers are serialized per collection (write_lock) and prepare the new
+    matrix, files and HNSW index without blocking readers; the new state is
+    swapped in under a short state lock.
+    """
+
+    def __init__(self, name: str, root: str):
+        self.name = name
+        self.path = os.path.join(root, _dir_name(name))
+        self.ids = []
+        self.documents = []
+        self.sources = []
+        self.matrix = None
+        self.ann = None
+        self.write_lock = threading.RLock()
+        self._state_lock = threading.Lock()
+        self._load()
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.path, "vectors.npy")
+
+    @property
+    def _docs_path(self):
+        return os.path.join(self.path, "docs.json")
+
+    @property
+    def _ann_path(self):
+        return os.path.join(self.path, "hnsw.bin")
+
+    def _load(self):
+        if not os.path.exists(self._docs_path):
+            return
+        with open(self._docs_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.ids = data["ids"]
+        self.documents = data["documents"]
+        self.sources = data.get("sources") or [None] * len(self.ids)
+        if os.path.exists(self._vectors_path):
+            self.matrix = np.load(self._vectors_path, mmap_mode="r")
+        if hnswlib is not None and os.path.exists(self._ann_path) and self.matrix is not None:
+            self.ann = hnswlib.Index(space="ip", dim=self.matrix.shape[1])
+            self.ann.load_index(self._ann_path, max_elements=len(self.ids))
+
+    def snapshot(self):
+        """(ids, documents, matrix, ann) as of now; writers never mutate these in place."""
+        with self._state_lock:
+            return self.ids, self.documents, self.matrix, self.ann
+
+    def _save(self, ids, documents, sources, matrix: np.ndarray):
+        os.makedirs(self.path, exist_ok=True)
+        _write_atomic(self._vectors_path, lambda f: np.save(f, matrix))
+        payload = json.dumps({"ids": ids, "documents": documents, "sources": sources}, ensure_ascii=False)
+        _write_atomic(self._docs_path, lambda f: f.write(payload.encode("utf-8")))
+        return np.load(self._vectors_path, mmap_mode="r")
+
+    def _build_ann(self, ids, matrix):
+        if hnswlib is None or matrix is None or len(ids) < LOCAL_ANN_THRESHOLD:
+            if os.path.exists(self._ann_path):
+                os.remove(self._ann_path)
+            return None
+        index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        index.init_index(max_elements=len(ids), ef_construction=200, M=16)
+        index.add_items(np.asarray(matrix), np.arange(len(ids)))
+        index.set_ef(64)
+        tmp = self._ann_path + ".tmp"
+        index.save_index(tmp)
+        os.replace(tmp, self._ann_path)
+        return index
+
+    def apply(self, ids=(), documents=(), embeddings=None, delete=(), source=None):
+        """
+        Delete `delete`, then upsert the given rows (recorded as coming from
+        `source`); the matrix and HNSW index are written/rebuilt once for the
+        whole batch.
+        """
+        with self.write_lock:
+            cur_ids, cur_docs, cur_matrix, _ = self.snapshot()
+            drop = set(delete)
+            keep = [i for i, cid in enumerate(cur_ids) if cid not in drop]
+            changed = len(keep) != len(cur_ids)
+            matrix = np.asarray(cur_matrix)[keep] if cur_matrix is not None else None
+            new_ids = [cur_ids[i] for i in keep]
+            new_docs = [cur_docs[i] for i in keep]
+            new_sources = [self.sources[i] for i in keep]
+
+            if len(ids):
+                vectors = _normalize(embeddings)
+                matrix = np.array(matrix) if matrix is not None else np.zeros((0, vectors.shape[1]), np.float32)
+                positions = {cid: i for i, cid in enumerate(new_ids)}
+                new_rows = []
+                for cid, doc, vec in zip(ids, documents, vectors):
+                    if cid in positions:
+                        i = positions[cid]
+                        new_docs[i] = doc
+                        new_sources[i] = source
+                        matrix[i] = vec
+                    else:
+                        positions[cid] = len(new_ids)
+                        new_ids.append(cid)
+                        new_docs.append(doc)
+                        new_sources.append(source)
+                        new_rows.append(vec)
+                if new_rows:
+                    matrix = np.vstack([matrix, np.stack(new_rows)])
+                changed = True
+
+            if not changed:
+                return
+            # Disk writes and the index build happen outside the state lock,
+            # so searches keep using the previous state until the swap
+            matrix = self._save(new_ids, new_docs, new_sources, matrix)
+            ann = self._build_ann(new_ids, matrix)
+            with self._state_lock:
+                self.ids, self.documents, self.matrix, self.ann = new_ids, new_docs, matrix, ann
+                self.sources = new_sources
+
+    def upsert(self, ids, documents, embeddings):
+        self.apply(ids, documents, embeddings)
+
+    def delete(self, ids):
+        self.apply(delete=ids)
+
+    def search(self, query_vector, top_k: int):
+        ids, documents, matrix, ann = self.snapshot()
+        k = min(top_k, len(ids))
+        if matrix is None or k <= 0:
+            return []
+        q = _normalize(query_vector)[0]
+        if ann is not None:
+            labels, _ = ann.knn_query(q, k=k)
+            return [documents[i] for i in labels[0]]
+        scores = matrix @ q
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [documents[i] for i in top]
+
+
+_collections = {}
+_lock = threading.Lock()  # guards _collections only
+
+
+def _collection(name: str, create: bool = True) -> _Collection:
+    with _lock:
+        if name not in _collections:
+            coll = _Collection(name, VECTOR_STORE_DIR)
+            if not create and not coll.ids:
+                raise ValueError(f"Collection {name} does not exist.")
+            _collections[name] = coll
+        return _collections[name]
+
+
+def _embed(texts):
+    # Imported lazily: the model is only needed for text queries/summaries
+    from app.services import pdf_service
+    return pdf_service.get_embeddings(texts)
+
+
+def store_chunks(chunks, embeddings, collection_name, source=None):
+    """
+    Apply only the delta against the previous version of this document
+    (`source`, default the collection name): add new chunks, delete its
+    chunks that are no longer present. Other documents are left alone.
+    """
+    source = source or collection_name
+    coll = _collection(collection_name)
+    # Per-collection: other collections stay searchable while this one indexes,
+    # and concurrent uploads to this one are applied one after the other
+    with coll.write_lock:
+        existing = {cid for cid, src in zip(coll.ids, coll.sources) if src == source}
+
+        ids, docs, vectors, seen = [], [], [], set()
+        for chunk, embedding in zip(chunks, embeddings):
+            cid = chunk_id(chunk)
+            if cid in seen:
+                continue
+            seen.add(cid)
+            if cid in existing:
+                continue
+            ids.append(cid)
+            docs.append(chunk)
+            vectors.append(embedding)
+
+        # An empty extraction is more likely a parse failure than an empty document
+        stale = [cid for cid in existing if cid not in seen] if seen else []
+        # One write and one index rebuild for the whole delta
+        coll.apply(ids, docs, np.asarray(vectors), delete=stale, source=source)
+
+    return {
+        "added": len(ids),
+        "deleted": len(stale),
+        "unchanged": len(seen) - len(ids),
+        "duplicates_skipped": len(chunks) - len(seen),
+    }
+
+
+def fetch_combined(collection_name):
+    return "\n\n".join(_collection(collection_name, create=False).snapshot()[1])
+
+
+def store_summary(summary_text, collection_name, pdf_filename):
+    doc_id = os.path.splitext(os.path.basename(pdf_filename))[0] + "_summary"
+    embedding = _embed([summary_text])
+    _collection(collection_name).upsert([doc_id], [summary_text], np.asarray(embedding))
+
+
+def query(text_query, top_k=3, collection_name=None):
+    return query_by_vector(_embed([text_query])[0], top_k, collection_name=collection_name)
+
+
+def query_by_vector(query_vector, top_k=3, collection_name=None):
+    if collection_name is None:
+        raise ValueError("collection_name must be specified")
+    coll = _collection(collection_name, create=False)
+    return {"documents": [coll.search(query_vector, top_k)]}
@@ -0,0 +1,130 @@
+# app/services/model_registry.py
+import asyncio
+import threading
+import time
+
+from app.config import MODEL_RETRY_BACKOFF, MODEL_RETRY_BACKOFF_MAX
+
+# -----------------------------
+# Lazy model registry
+# -----------------------------
+# Services register a loader (and optional warmup) at import time; nothing
+# heavy happens until the model is first used or the app startup hook kicks
+# off background loading. Load state feeds the /health/ready endpoint.
+# A failed load is not permanent: after a backoff (doubling with each
+# consecutive failure) the entry goes back to not_loaded and the next use
+# retries; the last error stays visible in the status until a load succeeds.
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelEntry:
+    def __init__(self, name, loader, warmup=None, required=True):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.required = required
+        self.state = NOT_LOADED
+        self.instance = None
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.failures = 0
+        self.retry_at = None  # monotonic time after which a failed load may be retried
+        self._lock = threading.Lock()
+
+    def _reset_if_due(self):
+        if self.state == FAILED and time.monotonic() >= self.retry_at:
+            self.state = NOT_LOADED
+
+    def load(self):
+        with self._lock:
+            self._reset_if_due()
+            if self.state == READY:
+                return self.instance
+            if self.state == FAILED:
+                retry_in = round(self.retry_at - time.monotonic(), 1)
+                raise RuntimeError(f"Model '{self.name}' failed to load: {self.error} (retry in {retry_in}s)")
+            self.state = LOADING
+            try:
+                t0 = time.perf_counter()
+                instance = self.loader()
+                t1 = time.perf_counter()
+                if self.warmup is not None:
+                    self.warmup(instance)
+                t2 = time.perf_counter()
+            except Exception as e:
+                self.state = FAILED
+                self.error = str(e)
+                self.failures += 1
+                backoff = min(MODEL_RETRY_BACKOFF * 2 ** (self.failures - 1), MODEL_RETRY_BACKOFF_MAX)
+                self.retry_at = time.monotonic() + backoff
+                print(f"⚠️ Failed to load model '{self.name}' (retry in {backoff:.0f}s): {e}")
+                raise RuntimeError(f"Model '{self.name}' failed to load: {e}") from e
+            self.instance = instance
+            self.load_seconds = round(t1 - t0, 3)
+            self.warmup_seconds = round(t2 - t1, 3) if self.warmup is not None else None
+            self.state = READY
+            self.error, self.failures, self.retry_at = None, 0, None
+            print(f"✅ Model '{self.name}' ready (load {self.load_seconds}s, warmup {self.warmup_seconds}s)")
+            return instance
+
+    def status(self):
+        # Never wait here: a held lock means a load is in progress anyway
+        if self._lock.acquire(blocking=False):
+            try:
+                self._reset_if_due()
+            finally:
+                self._lock.release()
+        return {
+            "state": self.state,
+            "required": self.required,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,  # last load error, kept until a load succeeds
+            "failures": self.failures,
+            "retry_in": round(max(0.0, self.retry_at - time.monotonic()), 1) if self.state == FAILED else None,
+        }
+
+
+_models = {}
+_background = []
+
+
+def register(name, loader, warmup=None, required=True):
+    """Register a model loader. Re-registering a name keeps the existing entry."""
+    if name not in _models:
+        _models[name] = ModelEntry(name, loader, warmup, required)
+    return _models[name]
+
+
+def get(name):
+    """Return the loaded model, loading it on this thread if necessary."""
+    return _models[name].load()
+
+
+def is_ready(name) -> bool:
+    entry = _models.get(name)
+    return entry is not None and entry.state == READY
+
+
+def start_background_loading():
+    """Load every registered model in worker threads without blocking startup."""
+    async def load(entry):
+        try:
+            await asyncio.to_thread(entry.load)
+        except RuntimeError:
+            pass  # state and error are recorded on the entry
+
+    for entry in _models.values():
+        if entry.state == NOT_LOADED:
+            _background.append(asyncio.create_task(load(entry)))
+
+
+def status() -> dict:
+    models = {name: entry.status() for name, entry in _models.items()}
+    ready = all(entry.state == READY for entry in _models.values() if entry.required)
+    return {"ready": ready, "models": models}
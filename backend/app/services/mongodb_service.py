@@ -1,46 +1,28 @@
-from pymongo import MongoClient
 from bson import ObjectId
-from app.config import MONGODB_URI
+from pymongo import ReturnDocument
+from app.db.mongo import summary_collection, quizzes_collection, timed_quiz_scores_collection
 from datetime import datetime
 import os
 import json
+import base64
 
-# Initialize MongoDB client
-client = MongoClient(MONGODB_URI)
-db = client["notes_summarizer"]
-
-# Custom JSON encoder for MongoDB objects
-class MongoJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
-def convert_mongo_doc(doc):
-    """Convert MongoDB document to JSON-serializable format"""
-    if doc is None:
-        return None
-        
-    if isinstance(doc, list):
-        return [convert_mongo_doc(item) for item in doc]
-        
-    if isinstance(doc, dict):
-        return {k: convert_mongo_doc(v) for k, v in doc.items()}
-        
-    if isinstance(doc, ObjectId):
-        return str(doc)
-        
-    if isinstance(doc, datetime):
-        return doc.isoformat()
-        
-    return doc
-
-def store_summary(summary_text, pdf_filename, audio_path, name):
-    """Store summary in MongoDB"""
-    summaries_collection = db["summaries"]
-    
+async def _insert_once(collection, doc, job_id):
+    """Insert a document; with a job_id, a re-run of the same job reuses its document"""
+    if job_id is None:
+        result = await collection.insert_one(doc)
+        return str(result.inserted_id)
+    doc["job_id"] = job_id
+    stored = await collection.find_one_and_update(
+        {"job_id": job_id},
+        {"$setOnInsert": doc},
+        upsert=True,
+        projection={"_id": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return str(stored["_id"])
+
+async def store_summary(summary_text, pdf_filename, audio_path, name, job_id=None):
+    """Store summary in MongoDB (idempotent per job_id)"""
     # Create summary document
     summary_doc = {
         "filename": pdf_filename,
@@ -53,13 +35,14 @@ def store_summary(summary_text, pdf_filename, audio_path, name):
     }
     
     # Insert document and return ID
-    result = summaries_collection.insert_one(summary_doc)
-    return str(result.inserted_id)
+    return await _insert_once(summary_collection, summary_doc, job_id)
 
-def store_quiz(quiz_data, pdf_filename, summary_id, name):
-    """Store quiz in MongoDB"""
-    quizzes_collection = db["quizzes"]
-    
+async def update_summary_audio(summary_id: str, audio_path: str):
+    """Point a summary at a new audio URL (e.g. once the remote upload is done)"""
+    await summary_collection.update_one({"_id": ObjectId(summary_id)}, {"$set": {"audio_path": audio_path}})
+
+async def store_quiz(quiz_data, pdf_filename, summary_id, name, job_id=None):
+    """Store quiz in MongoDB (idempotent per job_id)"""
     # Create quiz document
     quiz_doc = {
         "filename": pdf_filename,
@@ -71,42 +54,65 @@ def store_quiz(quiz_data, pdf_filename, summary_id, name):
     }
     
     # Insert document and return ID
-    result = quizzes_collection.insert_one(quiz_doc)
-    return str(result.inserted_id)
-
-def get_summaries():
-    """Get all summaries"""
-    summaries_collection = db["summaries"]
-    summaries = list(summaries_collection.find({}, {"summary": 1, "filename": 1, "audio_path": 1, "created_at": 1, "_id": 1,"name" : 1, "score":1})
-                .sort("created_at", -1))
-    
-    # Convert ObjectId to string
-    return convert_mongo_doc(summaries)
+    return await _insert_once(quizzes_collection, quiz_doc, job_id)
+
+# Fields shown in summary lists; the summary body is fetched per summary
+SUMMARY_LIST_PROJECTION = {"filename": 1, "audio_path": 1, "created_at": 1, "_id": 1, "name": 1, "score": 1}
+
+def encode_cursor(doc) -> str:
+    """Opaque keyset cursor: position of the last (created_at, _id) returned."""
+    payload = json.dumps({"c": doc["created_at"].isoformat(), "i": str(doc["_id"])})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
 
-def get_summaries_by_id(summary_id: str):
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), ObjectId(payload["i"])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+async def get_summaries(limit: int = 20, cursor: str = None, name: str = None):
+    """
+    One page of summaries, newest first, without the summary body.
+    Keyset pagination on (created_at, _id), served by the
+    (created_at, _id) / (name, created_at, _id) indexes.
+    Returns {"items": [...], "next_cursor": str | None}.
+    """
+    query = {}
+    if name:
+        query["name"] = name
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]
+
+    # Fetch one extra document to know whether another page exists
+    docs = await (summary_collection.find(query, SUMMARY_LIST_PROJECTION)
+                  .sort([("created_at", -1), ("_id", -1)])
+                  .limit(limit + 1)).to_list(length=limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+
+    # Raw documents: ObjectId/datetime are handled by FastJSONResponse
+    return {"items": docs[:limit], "next_cursor": next_cursor}
+
+async def get_summaries_by_id(summary_id: str):
     """Get summary, name, audio_path, _id by ID"""
-    summaries_collection = db["summaries"]
-    summaries = list(
-        summaries_collection.find(
-            {"_id": ObjectId(summary_id)},
-            {"summary": 1, "audio_path": 1, "_id": 1, "name": 1}
-        ).sort("created_at", -1)
-    )
-    return convert_mongo_doc(summaries)
+    summaries = await summary_collection.find(
+        {"_id": ObjectId(summary_id)},
+        {"summary": 1, "audio_path": 1, "_id": 1, "name": 1}
+    ).sort("created_at", -1).to_list(length=None)
+    return summaries
 
-def get_quiz_by_summary_id(summary_id):
+async def get_quiz_by_summary_id(summary_id):
     """Get quiz for a specific summary"""
-    quizzes_collection = db["quizzes"]
-    quiz = quizzes_collection.find_one({"summary_id": summary_id})
-    
-    # Convert ObjectId to string
-    return convert_mongo_doc(quiz)
+    return await quizzes_collection.find_one({"summary_id": summary_id})
 
-def get_quiz_submit_summary_id(summary_id, score):
+async def get_quiz_submit_summary_id(summary_id, score):
     """Update score for a quiz with a specific summary_id"""
-    quizzes_collection = db["summaries"]
-
-    result = quizzes_collection.update_one(
+    result = await summary_collection.update_one(
         {"_id":  ObjectId(summary_id)},
         {"$set": {"score": score}}
     )
@@ -117,8 +123,8 @@ def get_quiz_submit_summary_id(summary_id, score):
     return {"message": "Score changed successfully"}
 
 
-def store_timed_quiz_score(summary_id: str, score: int):
+async def store_timed_quiz_score(summary_id: str, score: int):
     # Example: store in collection 'timed_quiz_scores'
-    db.timed_quiz_scores.insert_one({"summary_id": summary_id, "score": score})
+    await timed_quiz_scores_collection.insert_one({"summary_id": summary_id, "score": score})
     return score
 
@@ -1,17 +1,259 @@
+import asyncio
+import multiprocessing
+import threading
 import fitz
 import re
-from sentence_transformers import SentenceTransformer
+import numpy as np
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from app.config import (
+    EMBEDDING_MODEL,
+    EMBED_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_EXTRACT_WORKERS,
+    PDF_PAGE_BATCH,
+    PDF_CHUNKER,
+    CHUNK_TARGET_TOKENS,
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+)
+from app.services import embedding_cache, embedding_service, model_registry
+from app.utils import chunk_utils
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL_NAME = EMBEDDING_MODEL
+
+def _load_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+def _warmup_model(model):
+    model.encode(["warmup"], show_progress_bar=False)
+
+# In-process model, only used when EMBED_WORKERS=0; otherwise the encoder
+# pool workers hold the only copies (see embedding_service)
+if EMBED_WORKERS == 0:
+    model_registry.register("sentence_transformer", _load_model, _warmup_model)
+
+def get_model():
+    model_registry.register("sentence_transformer", _load_model, _warmup_model)
+    return model_registry.get("sentence_transformer")
+
+CHUNK_SPLIT = re.compile(r'\n(?=\d+\.\s|[A-Z][^\n]{3,40}\n)')
+MIN_CHUNK_CHARS = 50
+
+def _page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+def _extract_page_range(pdf_path: str, start: int, stop: int):
+    """Text of pages [start, stop). Top-level so pool processes can run it."""
+    with fitz.open(pdf_path) as doc:
+        return [doc[i].get_text("text") for i in range(start, stop)]
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+def _get_extract_pool():
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extract_pool
+
+def shutdown_extract_pool():
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is not None:
+            _extract_pool.shutdown(wait=False, cancel_futures=True)
+        _extract_pool = None
+
+def iter_page_texts(pdf_path: str, stop: threading.Event = None):
+    """
+    Yield (page_number, text) in page order, 1-based.
+    Large PDFs are extracted in page ranges by worker processes; at most a
+    few ranges are in flight at once, so memory stays bounded. Setting `stop`
+    ends extraction at the next page (range) and cancels queued ranges.
+    """
+    total = _page_count(pdf_path)
+    if total < PDF_PARALLEL_MIN_PAGES or PDF_EXTRACT_WORKERS <= 1:
+        with fitz.open(pdf_path) as doc:
+            for i, page in enumerate(doc):
+                if stop is not None and stop.is_set():
+                    return
+                yield i + 1, page.get_text("text")
+        return
+
+    pool = _get_extract_pool()
+    ranges = [(i, min(i + PDF_PAGE_BATCH, total)) for i in range(0, total, PDF_PAGE_BATCH)]
+    window = PDF_EXTRACT_WORKERS * 2
+    pending = deque()
+    next_range = 0
+    try:
+        while next_range < len(ranges) or pending:
+            if stop is not None and stop.is_set():
+                return
+            while next_range < len(ranges) and len(pending) < window:
+                start, end = ranges[next_range]
+                pending.append((start, pool.submit(_extract_page_range, pdf_path, start, end)))
+                next_range += 1
+            start, future = pending.popleft()
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, text
+    finally:
+        # Stopped or abandoned early: don't leave ranges queued in the pool
+        for _, future in pending:
+            future.cancel()
+
+def _page_at(segments, starts, offset):
+    return segments[bisect_right(starts, offset) - 1][1]
+
+def _collect_pages(pages, sink: list):
+    for page_no, text in pages:
+        sink.append(text)
+        yield page_no, text
+
+def iter_chunk_records(pdf_path: str, pages: list = None, stop: threading.Event = None):
+    """
+    Yield chunks as pages are processed:
+    {"text": ..., "page_start": n, "page_end": m}.
+    PDF_CHUNKER selects the token-bounded chunker (default) or the legacy
+    heading regex. If `pages` is a list, each page's text is appended to it
+    as it is read (non-overlapping text, unlike the chunks). `stop` is passed
+    to iter_page_texts.
+    """
+    page_texts = iter_page_texts(pdf_path, stop)
+    if pages is not None:
+        page_texts = _collect_pages(page_texts, pages)
+    if PDF_CHUNKER == "regex":
+        return iter_regex_chunk_records(page_texts)
+    return chunk_utils.chunk_pages(
+        page_texts,
+        target_tokens=CHUNK_TARGET_TOKENS,
+        max_tokens=CHUNK_MAX_TOKENS,
+        overlap_tokens=CHUNK_OVERLAP_TOKENS,
+    )
+
+def iter_regex_chunk_records(page_texts):
+    """
+    Legacy chunking of (page_number, text) pairs: split on numbered/capitalised
+    heading lines.
+    Produces the same chunks as splitting the whole document at once, but only
+    keeps the unfinished tail of the previous pages in memory.
+    """
+    carry = ""
+    segments = []  # (offset in buffer where a page's text begins, page number)
+    last_page = None
+    for page_no, page_text in page_texts:
+        last_page = page_no
+        segments.append((len(carry), page_no))
+        starts = [start for start, _ in segments]
+        buffer = carry + page_text + "\n"
+        parts = CHUNK_SPLIT.split(buffer)
+
+        offset = 0
+        for part in parts[:-1]:
+            text = part.strip()
+            if len(text) > MIN_CHUNK_CHARS:
+                yield {
+                    "text": text,
+                    "page_start": _page_at(segments, starts, offset),
+                    "page_end": _page_at(segments, starts, max(offset, offset + len(part) - 1)),
+                }
+            offset += len(part) + 1  # +1 for the newline consumed by the split
+
+        # The last piece may continue on the next page; re-base its page map
+        carry = parts[-1]
+        first_page = _page_at(segments, starts, offset)
+        segments = [(0, first_page)] + [(start - offset, page) for start, page in segments if start > offset]
+
+    text = carry.strip()
+    if len(text) > MIN_CHUNK_CHARS:
+        yield {"text": text, "page_start": segments[0][1], "page_end": last_page}
 
 def extract_chunks(pdf_path: str):
-    doc = fitz.open(pdf_path)
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text("text") + "\n"
+    return [record["text"] for record in iter_chunk_records(pdf_path)]
+
+async def aiter_chunk_records(pdf_path: str, max_buffered: int = 64, pages: list = None):
+    """Async view of iter_chunk_records; parsing runs in a thread with backpressure."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_buffered)
+    done = object()
+    stop = threading.Event()  # set when the consumer goes away
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
 
-    chunks = re.split(r'\n(?=\d+\.\s|[A-Z][^\n]{3,40}\n)', full_text)
-    return [chunk.strip() for chunk in chunks if len(chunk.strip()) > 50]
+    def produce():
+        try:
+            for record in iter_chunk_records(pdf_path, pages, stop):
+                if stop.is_set():
+                    return
+                put(record)
+        except Exception as e:
+            if not stop.is_set():
+                put(e)
+        finally:
+            if not stop.is_set():
+                put(done)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Consumer finished, failed or was cancelled: stop parsing, then free
+        # the queue so a put() the producer is blocked on can complete. After
+        # the drain it makes at most one more put, which has room.
+        stop.set()
+        while not queue.empty():
+            queue.get_nowait()
+        await asyncio.shield(producer)
+
+def _split_cached(chunks):
+    """Return (keys, cached vectors by key, missing chunks by key)."""
+    keys = [embedding_cache.make_key(MODEL_NAME, chunk) for chunk in chunks]
+    cached = embedding_cache.get_many(keys)
+
+    missing = {}  # key -> chunk, deduplicated
+    for key, chunk in zip(keys, chunks):
+        if key not in cached and key not in missing:
+            missing[key] = chunk
+    return keys, cached, missing
+
+def _assemble(keys, cached, missing):
+    print(f"🧮 Embeddings: {len(keys) - len(missing)} cached, {len(missing)} encoded")
+    return np.stack([np.asarray(cached[key], dtype=np.float32) for key in keys])
 
 def get_embeddings(chunks):
-    return model.encode(chunks, show_progress_bar=True)
+    """Embed chunks, encoding only those not already in the embedding cache."""
+    if not chunks:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    keys, cached, missing = _split_cached(chunks)
+    if missing:
+        encoded = embedding_service.encode_blocking(list(missing.values()))
+        fresh = dict(zip(missing.keys(), encoded))
+        embedding_cache.put_many(fresh.items())
+        cached.update(fresh)
+    return _assemble(keys, cached, missing)
+
+async def get_embeddings_async(chunks):
+    """Same as get_embeddings, but cache misses go through the shared micro-batcher."""
+    if not chunks:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    keys, cached, missing = await asyncio.to_thread(_split_cached, chunks)
+    if missing:
+        encoded = await embedding_service.encode(list(missing.values()))
+        fresh = dict(zip(missing.keys(), encoded))
+        await asyncio.to_thread(embedding_cache.put_many, fresh.items())
+        cached.update(fresh)
+    return _assemble(keys, cached, missing)
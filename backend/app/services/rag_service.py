@@ -1,5 +1,5 @@
 # chat.py
-from app.services import chromadb_service
+from app.services import vector_store
 from .stt_service import speech_to_text
 from .tts_service import text_to_speech_bytes
 import openai
@@ -9,13 +9,28 @@ openai.api_key = os.getenv("OPENAI_API_KEY")
 
 def retrieve_context(query: str, collection_name: str, top_k: int = 3) -> str:
     """
-    Retrieve top_k relevant chunks from ChromaDB collection.
+    Retrieve top_k relevant chunks from the configured vector store.
     """
-    results = chromadb_service.query(query, top_k, collection_name=collection_name)
+    results = vector_store.query(query, top_k, collection_name=collection_name)
     if not results or "documents" not in results:
         return ""
     return " ".join([doc for docs in results["documents"] for doc in docs])
 
+async def retrieve_context_async(query: str, collection_name: str, top_k: int = 3) -> str:
+    """
+    Non-blocking retrieve_context for async handlers.
+    """
+    return " ".join(await retrieve_passages_async(query, collection_name, top_k))
+
+async def retrieve_passages_async(query: str, collection_name: str, top_k: int = 3) -> list:
+    """
+    Like retrieve_context_async, but returns the passages as a list.
+    """
+    results = await vector_store.query_async(query, top_k, collection_name=collection_name)
+    if not results or "documents" not in results:
+        return []
+    return [doc for docs in results["documents"] for doc in docs]
+
 def generate_gemini_response(query: str, context: str) -> str:
     """
     Sends query + context to Gemini API (LLM) and returns answer.
@@ -0,0 +1,120 @@
+# app/services/session_store.py
+import json
+import time
+import zlib
+
+from app.config import SESSION_BACKEND, SESSION_TTL, REDIS_URL
+
+# -----------------------------
+# Realtime session store
+# -----------------------------
+# Durable per-session state for /ws/assistant (selected collection and
+# conversation memory), keyed by a client-held session id instead of the
+# socket, so a reconnect can land on any worker and pick the session up.
+# Everything tied to the live socket (locks, recognizer, tasks) stays local.
+#
+#   memory  one process only; fine for a single uvicorn worker
+#   redis   shared between workers/nodes; any Redis-protocol server works
+#
+# Entries expire SESSION_TTL seconds after their last save.
+
+KEY_PREFIX = "studygenie:session:"
+_COMPRESS_MIN_BYTES = 1024
+
+
+def _dumps(state: dict) -> bytes:
+    """Compact JSON; zlib-compressed (flagged by a leading byte) when large."""
+    raw = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) >= _COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(raw)
+    return b"j" + raw
+
+
+def _loads(blob: bytes) -> dict:
+    if blob[:1] == b"z":
+        return json.loads(zlib.decompress(blob[1:]))
+    return json.loads(blob[1:])
+
+
+class MemorySessionStore:
+    """Sessions live only in this process."""
+
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+        self._items = {}  # session_id -> (expires_at, blob)
+
+    def _purge(self):
+        now = time.monotonic()
+        for session_id in [k for k, (expires, _) in self._items.items() if expires <= now]:
+            del self._items[session_id]
+
+    async def load(self, session_id: str):
+        self._purge()
+        item = self._items.get(session_id)
+        return _loads(item[1]) if item else None
+
+    async def save(self, session_id: str, state: dict):
+        self._purge()
+        self._items[session_id] = (time.monotonic() + self.ttl, _dumps(state))
+
+    async def delete(self, session_id: str):
+        self._items.pop(session_id, None)
+
+    async def close(self):
+        self._items.clear()
+
+
+class RedisSessionStore:
+    """
+    Sessions shared through Redis (SET with EX, so expiry is server-side).
+    Pass `client` to use any redis.asyncio-compatible client, e.g. a local
+    stand-in such as fakeredis in tests.
+    """
+
+    def __init__(self, url: str = REDIS_URL, ttl: int = SESSION_TTL, client=None):
+        self.ttl = ttl
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package") from e
+            client = redis.from_url(url)
+        self._client = client
+
+    async def load(self, session_id: str):
+        blob = await self._client.get(KEY_PREFIX + session_id)
+        return _loads(blob) if blob else None
+
+    async def save(self, session_id: str, state: dict):
+        await self._client.set(KEY_PREFIX + session_id, _dumps(state), ex=self.ttl)
+
+    async def delete(self, session_id: str):
+        await self._client.delete(KEY_PREFIX + session_id)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+BACKENDS = {
+    "memory": MemorySessionStore,
+    "redis": RedisSessionStore,
+}
+
+_store = None
+
+
+def get_store():
+    """The configured store, created on first use."""
+    global _store
+    if _store is None:
+        if SESSION_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown SESSION_BACKEND '{SESSION_BACKEND}', expected one of {sorted(BACKENDS)}")
+        _store = BACKENDS[SESSION_BACKEND]()
+    return _store
+
+
+async def close_store():
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
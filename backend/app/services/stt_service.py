@@ -1,21 +1,159 @@
 # app/services/stt_service.py
 import os
-from vosk import Model, KaldiRecognizer
 import wave
 import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.services import model_registry, audio_decoder
+from app.config import STT_WORKERS
 
 # -----------------------------
-# Load Vosk model
+# Vosk model (loaded lazily via the model registry)
 # -----------------------------
 # Choose either small or full model
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "../../vosk-model-en-us-0.22/vosk-model-en-us-0.22")
-model = None
-try:
-    model = Model(MODEL_PATH)
-    print("Vosk model loaded successfully!")
-except Exception as e:
-    print(f"Warning: Failed to load Vosk model: {str(e)}")
-    print("Speech-to-text functionality will be disabled. Download the model from https://alphacephei.com/vosk/models")
+
+def _load_model():
+    from vosk import Model
+    if not os.path.isdir(MODEL_PATH):
+        raise FileNotFoundError(
+            f"{MODEL_PATH} not found. Download the model from https://alphacephei.com/vosk/models"
+        )
+    return Model(MODEL_PATH)
+
+def _warmup_model(model):
+    from vosk import KaldiRecognizer
+    rec = KaldiRecognizer(model, 16000)
+    rec.AcceptWaveform(b"\x00\x00" * 16000)  # one second of silence
+    rec.FinalResult()
+
+# Optional: the app stays ready without speech-to-text
+model_registry.register("vosk", _load_model, _warmup_model, required=False)
+
+def get_model():
+    """Return the Vosk model, or None if it is not installed."""
+    try:
+        return model_registry.get("vosk")
+    except RuntimeError:
+        return None
+
+# -----------------------------
+# STT executor and recognizer pool
+# -----------------------------
+# Decoding runs in Kaldi's native code, which releases the GIL, so a bounded
+# thread pool runs STT_WORKERS transcriptions in parallel across cores while
+# the event loop stays free. The model is shared; recognizers are expensive to
+# build, so they are reset and reused per sample rate.
+
+_executor = None
+_executor_lock = threading.Lock()
+_idle_recognizers = {}  # sample rate -> [KaldiRecognizer]
+_pool_lock = threading.Lock()
+_stats = {"submitted": 0, "completed": 0, "failed": 0, "running": 0, "queue_depth": 0,
+          "wait_seconds": 0.0, "run_seconds": 0.0, "max_latency_seconds": 0.0,
+          "recognizers_created": 0, "recognizers_reused": 0}
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=STT_WORKERS, thread_name_prefix="stt")
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+    with _pool_lock:
+        _idle_recognizers.clear()
+
+
+async def run(func, *args):
+    """Run a blocking STT call on the STT pool, recording queue and run time."""
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+    started = []
+    dequeued = []
+
+    def leave_queue():
+        # Exactly once per call: when the job starts, or if it never will
+        with _pool_lock:
+            if not dequeued:
+                dequeued.append(True)
+                _stats["queue_depth"] -= 1
+
+    def job():
+        leave_queue()
+        started.append(time.perf_counter())
+        with _pool_lock:
+            _stats["running"] += 1
+        try:
+            return func(*args)
+        finally:
+            with _pool_lock:
+                _stats["running"] -= 1
+
+    _stats["submitted"] += 1
+    with _pool_lock:
+        _stats["queue_depth"] += 1
+    try:
+        result = await loop.run_in_executor(_get_executor(), job)
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        leave_queue()
+    finished = time.perf_counter()
+    _stats["completed"] += 1
+    _stats["wait_seconds"] += started[0] - submitted
+    _stats["run_seconds"] += finished - started[0]
+    _stats["max_latency_seconds"] = max(_stats["max_latency_seconds"], finished - submitted)
+    return result
+
+
+def acquire_recognizer(sample_rate: int):
+    """Take an idle recognizer for this rate, or build one. None without a model."""
+    with _pool_lock:
+        idle = _idle_recognizers.get(sample_rate)
+        if idle:
+            _stats["recognizers_reused"] += 1
+            return idle.pop()
+    model = get_model()
+    if model is None:
+        return None
+    from vosk import KaldiRecognizer
+    rec = KaldiRecognizer(model, sample_rate)
+    rec.SetWords(True)
+    _stats["recognizers_created"] += 1
+    return rec
+
+
+def release_recognizer(sample_rate: int, rec):
+    """Reset a recognizer and keep it for reuse (at most one per worker)."""
+    rec.Reset()
+    with _pool_lock:
+        idle = _idle_recognizers.setdefault(sample_rate, [])
+        if len(idle) < STT_WORKERS:
+            idle.append(rec)
+
+
+def stats() -> dict:
+    done = _stats["completed"]
+    return {
+        **_stats,
+        "wait_seconds": round(_stats["wait_seconds"], 3),
+        "run_seconds": round(_stats["run_seconds"], 3),
+        "max_latency_seconds": round(_stats["max_latency_seconds"], 3),
+        "avg_latency_seconds": round((_stats["wait_seconds"] + _stats["run_seconds"]) / done, 3) if done else 0.0,
+        "idle_recognizers": {rate: len(recs) for rate, recs in _idle_recognizers.items()},
+        "workers": STT_WORKERS,
+    }
 
 # -----------------------------
 # Speech-to-Text function
@@ -28,28 +166,120 @@ def speech_to_text(audio_file_path: str) -> str:
     Returns:
         str: transcribed text
     """
-    if model is None:
-        return "[Speech-to-text model not available. Please install the Vosk model.]"
-        
     wf = wave.open(audio_file_path, "rb")
 
     if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() not in [8000, 16000, 44100]:
      raise ValueError("Audio file must be WAV format mono PCM")
 
+    with wf:
+        return transcribe_pcm(wf.readframes(wf.getnframes()), wf.getframerate())
 
-    rec = KaldiRecognizer(model, wf.getframerate())
-    rec.SetWords(True)
+
+def transcribe_pcm(pcm: bytes, sample_rate: int = 16000) -> str:
+    """Transcribe a buffer of 16-bit mono PCM (blocking; see transcribe_pcm_async)."""
+    rec = acquire_recognizer(sample_rate)
+    if rec is None:
+        return "[Speech-to-text model not available. Please install the Vosk model.]"
 
     result_text = ""
-    while True:
-        data = wf.readframes(4000)
-        if len(data) == 0:
-            break
-        if rec.AcceptWaveform(data):
-            res = json.loads(rec.Result())
-            result_text += " " + res.get("text", "")
-    # Get final partial result
-    res = json.loads(rec.FinalResult())
-    result_text += " " + res.get("text", "")
+    try:
+        step = 8000  # 4000 frames of 16-bit audio
+        for i in range(0, len(pcm), step):
+            if rec.AcceptWaveform(pcm[i:i + step]):
+                res = json.loads(rec.Result())
+                result_text += " " + res.get("text", "")
+        # Get final partial result
+        res = json.loads(rec.FinalResult())
+        result_text += " " + res.get("text", "")
+    except Exception:
+        rec = None  # don't return a recognizer in an unknown state
+        raise
+    finally:
+        if rec is not None:
+            release_recognizer(sample_rate, rec)
 
     return result_text.strip()
+
+
+async def transcribe_pcm_async(pcm: bytes, sample_rate: int = 16000) -> str:
+    return await run(transcribe_pcm, pcm, sample_rate)
+
+
+async def transcribe_audio(data: bytes) -> str:
+    """Decode an uploaded/recorded clip in memory and transcribe it."""
+    pcm = await audio_decoder.decode_to_pcm_async(data, audio_decoder.TARGET_RATE)
+    return await transcribe_pcm_async(pcm, audio_decoder.TARGET_RATE)
+
+
+# -----------------------------
+# Streaming recognition session
+# -----------------------------
+class StreamingRecognizer:
+    """
+    One Vosk recognizer kept for the life of a connection. Feed raw 16-bit
+    mono PCM as it arrives; each call returns a partial or final result.
+
+        session = StreamingRecognizer(16000)
+        result = session.accept(pcm)   # {"type": "partial"|"final", "text": ...}
+        result = session.finalize()    # flush at end of stream
+
+    Calls are serialized by a lock, so close()/reset() wait for an accept()
+    still running on an STT thread instead of resetting the recognizer under it.
+    """
+
+    def __init__(self, sample_rate: int = 16000):
+        rec = acquire_recognizer(sample_rate)
+        if rec is None:
+            raise RuntimeError("Speech-to-text model not available. Please install the Vosk model.")
+        self.sample_rate = sample_rate
+        self._recognizer = rec
+        self._last_partial = ""
+        self._lock = threading.Lock()
+
+    def accept(self, pcm: bytes):
+        """Returns a final result on endpoint detection, a partial result when
+        the hypothesis changed, otherwise None."""
+        with self._lock:
+            if self._recognizer is None:
+                return None  # closed
+            return self._accept(pcm)
+
+    def _accept(self, pcm: bytes):
+        if self._recognizer.AcceptWaveform(pcm):
+            self._last_partial = ""
+            text = json.loads(self._recognizer.Result()).get("text", "")
+            return {"type": "final", "text": text}
+        partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        if partial != self._last_partial:
+            self._last_partial = partial
+            return {"type": "partial", "text": partial}
+        return None
+
+    def finalize(self):
+        """Flush buffered audio and return whatever was recognized."""
+        with self._lock:
+            if self._recognizer is None:
+                return {"type": "final", "text": ""}
+            self._last_partial = ""
+            text = json.loads(self._recognizer.FinalResult()).get("text", "")
+            return {"type": "final", "text": text}
+
+    def reset(self):
+        with self._lock:
+            if self._recognizer is not None:
+                self._recognizer.Reset()
+            self._last_partial = ""
+
+    def close(self):
+        """Hand the recognizer back to the pool (blocking; see close_in_background)."""
+        with self._lock:
+            if self._recognizer is not None:
+                release_recognizer(self.sample_rate, self._recognizer)
+                self._recognizer = None
+
+    def close_in_background(self):
+        """close() on an STT thread, for callers on the event loop that can't await."""
+        try:
+            _get_executor().submit(self.close)
+        except RuntimeError:
+            pass  # executor shut down: the app is stopping anyway
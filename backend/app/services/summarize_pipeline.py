@@ -0,0 +1,153 @@
+# app/services/summarize_pipeline.py
+import asyncio
+import os
+
+import numpy as np
+
+from app.services import pdf_service, gemini_service, vector_store, tts_service, mongodb_service, audio_storage
+from app.models.schemas import QuizQuestion
+from app.utils.pipeline import Stage, run_pipeline
+
+# Chunks per embedding request issued while the PDF is still being parsed
+EMBED_STREAM_WINDOW = 32
+
+
+def build_stages(file_path: str, filename: str, name: str, job_id: str = None, recorded: dict = None,
+                 background: list = None):
+    """
+    Summarize pipeline as a DAG:
+
+        extract ─┬─ embed ── index
+                 └─ partials ─┬─ summary ─┬─ store_summary_vector
+                              │           └─ tts ── upload ── save_summary ─┐
+                              └─ quiz ──────────────────────────────────── save_quiz
+
+    Summary and quiz only need the extracted text, so they run alongside
+    the embedding/indexing branch instead of after it. Extraction streams
+    chunks page by page and starts embedding each window of chunks while
+    later pages are still being parsed.
+
+    `recorded` maps stage name -> output from an earlier, interrupted run of
+    the same job; those stages return the recorded value instead of running
+    again (a recorded upload also skips tts). `job_id` makes the Mongo
+    writes idempotent, so a re-run never duplicates documents.
+
+    Tasks started outside a stage (the embedding windows) are appended to
+    `background`, so the caller can cancel them if the pipeline fails.
+    """
+    base_id = os.path.splitext(filename)[0]
+    embedding_windows = background if background is not None else []  # started by extract, awaited by embed
+    pages = []  # page texts collected by extract, for partials
+
+    async def extract(_):
+        chunks, window = [], []
+        async for record in pdf_service.aiter_chunk_records(file_path, pages=pages):
+            chunks.append(record["text"])
+            window.append(record["text"])
+            if len(window) >= EMBED_STREAM_WINDOW:
+                embedding_windows.append(asyncio.create_task(pdf_service.get_embeddings_async(window)))
+                window = []
+        if window:
+            embedding_windows.append(asyncio.create_task(pdf_service.get_embeddings_async(window)))
+        return chunks
+
+    async def embed(r):
+        if not embedding_windows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(await asyncio.gather(*embedding_windows))
+
+    def index(r):
+        return vector_store.store_chunks(r["extract"], r["embed"], base_id, source=filename)
+
+    async def partials(r):
+        # Large documents are summarized map-reduce style from the page text
+        # (chunks overlap, so joining them would repeat text in the prompts);
+        # small ones pass through as one combined text
+        return await gemini_service.get_partial_summaries([p for p in pages if p.strip()])
+
+    async def summary(r):
+        return await gemini_service.get_summary("\n\n".join(r["partials"]))
+
+    async def quiz(r):
+        try:
+            # Reuses the intermediate summaries instead of the full text
+            quiz_data = await gemini_service.get_quiz("\n\n".join(r["partials"]))
+            print("🧠 Raw quiz:", quiz_data)
+            # Validate shape before anything is stored
+            [QuizQuestion(**q) for q in quiz_data]
+            return quiz_data
+        except Exception as e:
+            print("⚠️ Quiz generation failed:", e)
+            return []
+
+    def store_summary_vector(r):
+        vector_store.store_summary(r["summary"], collection_name=f"{base_id}_summary", pdf_filename=filename)
+
+    def tts(r):
+        return tts_service.text_to_speech_bytes(r["summary"])
+
+    async def upload(r):
+        # Playable right away from local storage; the remote upload starts in save_summary
+        return await audio_storage.save(r["tts"])
+
+    async def save_summary(r):
+        summary_id = await mongodb_service.store_summary(r["summary"], filename, r["upload"], name, job_id=job_id)
+
+        async def use_remote_url(url):
+            await mongodb_service.update_summary_audio(summary_id, url)
+
+        audio_storage.publish(r["upload"], use_remote_url)
+        return summary_id
+
+    async def save_quiz(r):
+        if not r["quiz"]:
+            return None
+        try:
+            return await mongodb_service.store_quiz(r["quiz"], filename, r["save_summary"], name, job_id=job_id)
+        except Exception as e:
+            print("⚠️ Quiz storage failed:", e)
+            return None
+
+    stages = [
+        Stage("extract", extract),
+        Stage("embed", embed, ["extract"]),
+        Stage("index", index, ["extract", "embed"]),
+        Stage("partials", partials, ["extract"]),
+        Stage("summary", summary, ["partials"]),
+        Stage("quiz", quiz, ["partials"]),
+        Stage("store_summary_vector", store_summary_vector, ["summary"]),
+        Stage("tts", tts, ["summary"]),
+        Stage("upload", upload, ["tts"]),
+        Stage("save_summary", save_summary, ["summary", "upload"]),
+        Stage("save_quiz", save_quiz, ["quiz", "save_summary"]),
+    ]
+
+    recorded = dict(recorded or {})
+    if "upload" in recorded:
+        recorded.setdefault("tts", None)  # audio already stored
+    return [
+        Stage(stage.name, _recorded(recorded[stage.name]), stage.deps) if stage.name in recorded else stage
+        for stage in stages
+    ]
+
+
+def _recorded(value):
+    async def replay(_):
+        return value
+    return replay
+
+
+async def run_summarize(file_path: str, filename: str, name: str, on_stage_done=None,
+                        job_id: str = None, recorded: dict = None):
+    """Run the summarize pipeline. Returns (results, timings)."""
+    background = []
+    stages = build_stages(file_path, filename, name, job_id=job_id, recorded=recorded, background=background)
+    try:
+        results, timings = await run_pipeline(stages, on_stage_done)
+    finally:
+        # Only embed awaits the windows; a failure elsewhere must not orphan them
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+    print("⏱️ Summarize stage timings (ms):", {k: v["duration_ms"] for k, v in timings.items()})
+    return results, timings
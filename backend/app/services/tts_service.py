@@ -1,6 +1,10 @@
 # app/services/tts_service.py
 import requests
 import os
+import re
+import asyncio
+import httpx
+from app.config import TTS_STREAM_CONCURRENCY, TTS_STREAM_LATENCY_LEVEL
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE = "siw1N9V8LmYeEWKyWBxv"  # change if needed
@@ -53,3 +57,132 @@ def text_to_speech_bytes(text: str) -> bytes:
         return response.content  # raw audio bytes
     else:
         raise Exception(f"TTS failed: {response.text}")
+
+
+# -----------------------------
+# Sentence-pipelined streaming TTS
+# -----------------------------
+# Answers are split into sentences as text arrives; each sentence is sent to
+# ElevenLabs' streaming endpoint as soon as it is complete, several at a time,
+# and the audio is handed back strictly in sentence order. Playback can start
+# after the first sentence instead of after the whole answer.
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+_client = None
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url="https://api.elevenlabs.io/v1",
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=TTS_STREAM_CONCURRENCY * 4, keepalive_expiry=30.0),
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class SentenceSplitter:
+    """Accumulates streamed text and returns complete sentences.
+    Very short sentences are held back and merged with the next one so each
+    TTS request carries a reasonable amount of text."""
+
+    def __init__(self, min_chars: int = 40):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        pieces = _SENTENCE_END.split(self._buffer)
+        # The last piece may still be growing
+        self._buffer = pieces.pop()
+        sentences, current = [], ""
+        for piece in pieces:
+            current = f"{current} {piece}".strip() if current else piece.strip()
+            if len(current) >= self.min_chars:
+                sentences.append(current)
+                current = ""
+        if current:
+            self._buffer = f"{current} {self._buffer}" if self._buffer else current + " "
+        return sentences
+
+    def flush(self) -> list:
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+async def synthesize_stream(text: str) -> bytes:
+    """Synthesize one piece of text via the streaming endpoint; returns MP3 bytes."""
+    if ELEVENLABS_API_KEY is None:
+        raise ValueError("ELEVENLABS_API_KEY not set in environment")
+
+    payload = {
+        "text": text,
+        "voice_settings": {"stability": 0.7, "similarity_boost": 0.75}
+    }
+    audio = bytearray()
+    async with _get_client().stream(
+        "POST",
+        f"/text-to-speech/{ELEVENLABS_VOICE}/stream",
+        params={"optimize_streaming_latency": TTS_STREAM_LATENCY_LEVEL},
+        headers={"xi-api-key": ELEVENLABS_API_KEY, "Content-Type": "application/json"},
+        json=payload,
+    ) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise Exception(f"TTS failed: {body.decode(errors='replace')}")
+        async for chunk in response.aiter_bytes():
+            audio += chunk
+    return bytes(audio)
+
+
+class SpeechPipeline:
+    """Synthesizes sentences concurrently and yields their audio in order.
+
+        pipeline = SpeechPipeline()
+        pipeline.add("First sentence.")
+        pipeline.close()
+        async for audio in pipeline.audio():
+            ...
+    """
+
+    def __init__(self, concurrency: int = None):
+        self._semaphore = asyncio.Semaphore(concurrency or TTS_STREAM_CONCURRENCY)
+        self._tasks = asyncio.Queue()
+        self._pending = []
+
+    async def _synthesize(self, sentence: str):
+        async with self._semaphore:
+            try:
+                return await synthesize_stream(sentence)
+            except Exception as e:
+                print(f"TTS Error: {e}")
+                return None
+
+    def add(self, sentence: str):
+        task = asyncio.create_task(self._synthesize(sentence))
+        self._pending.append(task)
+        self._tasks.put_nowait(task)
+
+    def close(self):
+        self._tasks.put_nowait(None)
+
+    async def audio(self):
+        """Yield MP3 bytes per sentence, in the order sentences were added."""
+        while True:
+            task = await self._tasks.get()
+            if task is None:
+                return
+            audio = await task
+            if audio:
+                yield audio
+
+    def cancel(self):
+        for task in self._pending:
+            task.cancel()
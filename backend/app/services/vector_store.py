@@ -0,0 +1,60 @@
+# app/services/vector_store.py
+import asyncio
+import importlib
+
+from app.config import VECTOR_BACKEND
+
+# -----------------------------
+# Vector store facade
+# -----------------------------
+# Every backend is a module exposing the same four functions:
+#   store_chunks(chunks, embeddings, collection_name, source=None)
+#   fetch_combined(collection_name) -> str
+#   store_summary(summary_text, collection_name, pdf_filename)
+#   query(text_query, top_k=3, collection_name=None) -> {"documents": [[...]]}
+# The backend module is imported on first use, so the Chroma Cloud client is
+# never created when running with the local backend.
+
+BACKENDS = {
+    "chroma": "app.services.chromadb_service",
+    "local": "app.services.local_vector_store",
+}
+
+_backend = None
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        if VECTOR_BACKEND not in BACKENDS:
+            raise ValueError(f"Unknown VECTOR_BACKEND '{VECTOR_BACKEND}', expected one of {sorted(BACKENDS)}")
+        _backend = importlib.import_module(BACKENDS[VECTOR_BACKEND])
+    return _backend
+
+
+def store_chunks(chunks, embeddings, collection_name, source=None):
+    """`source` identifies the document; re-storing it replaces only its own chunks."""
+    return backend().store_chunks(chunks, embeddings, collection_name, source=source)
+
+
+def fetch_combined(collection_name):
+    return backend().fetch_combined(collection_name)
+
+
+def store_summary(summary_text, collection_name, pdf_filename):
+    return backend().store_summary(summary_text, collection_name, pdf_filename)
+
+
+def query(text_query, top_k=3, collection_name=None):
+    return backend().query(text_query, top_k, collection_name=collection_name)
+
+
+async def query_async(text_query, top_k=3, collection_name=None):
+    """Non-blocking query. Backends that search by vector embed the query
+    through the shared micro-batching encoder."""
+    impl = backend()
+    if hasattr(impl, "query_by_vector"):
+        from app.services import embedding_service
+        query_vector = (await embedding_service.encode([text_query]))[0]
+        return await asyncio.to_thread(impl.query_by_vector, query_vector, top_k, collection_name=collection_name)
+    return await asyncio.to_thread(impl.query, text_query, top_k, collection_name=collection_name)
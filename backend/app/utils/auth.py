@@ -6,6 +6,15 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.models.user import UserInDB, TokenData
 from app.db.mongo import users_collection
+from app.config import (
+    BCRYPT_ROUNDS, AUTH_HASH_WORKERS, TOKEN_CACHE_SIZE, USER_CACHE_SIZE, USER_CACHE_TTL, AUTH_STATELESS,
+)
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import asyncio
+import hashlib
+import threading
+import time
 import os
 from dotenv import load_dotenv
 from bson import ObjectId
@@ -19,8 +28,15 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
-# Set up password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Set up password hashing. Hashes with a different cost than BCRYPT_ROUNDS
+# are reported by verify_and_update, so they are upgraded on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -31,6 +47,94 @@ def get_password_hash(password: str) -> str:
     """Hash the password"""
     return pwd_context.hash(password)
 
+# -----------------------------
+# Password hashing pool
+# -----------------------------
+# bcrypt takes ~100-300 ms of CPU per call. It releases the GIL, so hashing
+# and verification run on a dedicated pool of AUTH_HASH_WORKERS threads and
+# a burst of logins queues there instead of stalling the event loop.
+
+_hash_executor = None
+_hash_lock = threading.Lock()
+_hash_stats = {"submitted": 0, "completed": 0, "running": 0, "queue_depth": 0, "rehashed": 0,
+               "wait_seconds": 0.0, "run_seconds": 0.0, "max_latency_seconds": 0.0}
+
+def _get_hash_executor():
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+        return _hash_executor
+
+def shutdown_hash_executor():
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
+async def _run_hashing(func, *args):
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+    started = []
+    dequeued = []
+
+    def leave_queue():
+        # Exactly once per call: when the job starts, or if it never will
+        with _hash_lock:
+            if not dequeued:
+                dequeued.append(True)
+                _hash_stats["queue_depth"] -= 1
+
+    def job():
+        leave_queue()
+        started.append(time.perf_counter())
+        with _hash_lock:
+            _hash_stats["running"] += 1
+        try:
+            return func(*args)
+        finally:
+            with _hash_lock:
+                _hash_stats["running"] -= 1
+
+    _hash_stats["submitted"] += 1
+    with _hash_lock:
+        _hash_stats["queue_depth"] += 1
+    try:
+        return await loop.run_in_executor(_get_hash_executor(), job)
+    finally:
+        leave_queue()
+        finished = time.perf_counter()
+        if started:
+            _hash_stats["completed"] += 1
+            _hash_stats["wait_seconds"] += started[0] - submitted
+            _hash_stats["run_seconds"] += finished - started[0]
+            _hash_stats["max_latency_seconds"] = max(_hash_stats["max_latency_seconds"], finished - submitted)
+
+async def hash_password(password: str) -> str:
+    """Awaitable get_password_hash, run on the hashing pool"""
+    return await _run_hashing(get_password_hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """
+    Awaitable verification on the hashing pool.
+    Returns (valid, new_hash); new_hash is set when the stored hash should
+    be replaced (e.g. BCRYPT_ROUNDS changed).
+    """
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def hashing_stats() -> dict:
+    done = _hash_stats["completed"]
+    return {
+        **_hash_stats,
+        "wait_seconds": round(_hash_stats["wait_seconds"], 3),
+        "run_seconds": round(_hash_stats["run_seconds"], 3),
+        "max_latency_seconds": round(_hash_stats["max_latency_seconds"], 3),
+        "avg_latency_seconds": round((_hash_stats["wait_seconds"] + _hash_stats["run_seconds"]) / done, 3) if done else 0.0,
+        "workers": AUTH_HASH_WORKERS,
+        "rounds": BCRYPT_ROUNDS,
+    }
+
 async def get_user_by_email(email: str) -> Optional[UserInDB]:
     """Get a user by email from the database"""
     user_dict = await users_collection.find_one({"email": email})
@@ -51,13 +155,99 @@ async def get_user_by_id(user_id: str) -> Optional[UserInDB]:
         pass
     return None
 
+# -----------------------------
+# Verification caches
+# -----------------------------
+# Decoded access tokens are kept in an LRU keyed by sha256(token) and dropped
+# at the token's exp, so repeat requests skip signature checks. Refresh tokens
+# (long-lived, used rarely) are never cached. Users are cached by id for
+# USER_CACHE_TTL seconds; call invalidate_user() after changing one.
+# With AUTH_STATELESS the current user is built from the access token's
+# claims and the database is not touched at all, so a changed name (or a
+# deleted user) only shows up once the access token is reissued, i.e. after
+# the next login or refresh, at most ACCESS_TOKEN_EXPIRE_MINUTES later.
+
+_token_cache = OrderedDict()  # sha256 -> (exp timestamp, TokenData)
+_user_cache = OrderedDict()   # user_id -> (expires monotonic, UserInDB)
+_cache_stats = {"token_hits": 0, "token_misses": 0, "user_hits": 0, "user_misses": 0, "stateless_hits": 0}
+
+def _token_key(token: str, token_type: str) -> str:
+    return hashlib.sha256(f"{token_type}:{token}".encode("utf-8")).hexdigest()
+
+def verify_token_cached(token: str, token_type: str = "access") -> Optional[TokenData]:
+    """verify_token with an LRU of already-decoded tokens (access tokens only)"""
+    if token_type != "access":
+        return verify_token(token, token_type)
+    key = _token_key(token, token_type)
+    entry = _token_cache.get(key)
+    if entry is not None:
+        if entry[0] > time.time():
+            _token_cache.move_to_end(key)
+            _cache_stats["token_hits"] += 1
+            return entry[1]
+        del _token_cache[key]  # expired
+
+    _cache_stats["token_misses"] += 1
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+    token_data = verify_token(token, token_type)
+    if token_data is not None and exp is not None:
+        _token_cache[key] = (float(exp), token_data)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return token_data
+
+async def get_user_by_id_cached(user_id: str) -> Optional[UserInDB]:
+    """get_user_by_id with a short-TTL cache (misses are not cached)"""
+    entry = _user_cache.get(user_id)
+    if entry is not None:
+        if entry[0] > time.monotonic():
+            _user_cache.move_to_end(user_id)
+            _cache_stats["user_hits"] += 1
+            return entry[1]
+        del _user_cache[user_id]
+
+    _cache_stats["user_misses"] += 1
+    user = await get_user_by_id(user_id)
+    if user is not None:
+        _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL, user)
+        if len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+    return user
+
+def invalidate_user(user_id: str):
+    """Drop a cached user after it changes"""
+    _user_cache.pop(user_id, None)
+
+def access_token_claims(user_id: str, email: str, name: str, created_at: datetime) -> dict:
+    """Claims for an access token; name/created_at allow AUTH_STATELESS lookups"""
+    return {"sub": email, "user_id": user_id, "name": name, "created_at": created_at.isoformat()}
+
+def auth_cache_stats() -> dict:
+    return {
+        **_cache_stats,
+        "tokens_cached": len(_token_cache),
+        "users_cached": len(_user_cache),
+        "user_cache_ttl": USER_CACHE_TTL,
+        "stateless": AUTH_STATELESS,
+    }
+
 async def authenticate_user(email: str, password: str) -> Union[UserInDB, bool]:
     """Authenticate a user by email and password"""
     user = await get_user_by_email(email)
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    valid, new_hash = await verify_and_update_password(password, user.password_hash)
+    if not valid:
         return False
+    if new_hash:
+        # Opportunistic rehash: the stored hash used an outdated cost
+        await users_collection.update_one({"_id": ObjectId(user.id)}, {"$set": {"password_hash": new_hash}})
+        invalidate_user(user.id)
+        user.password_hash = new_hash
+        _hash_stats["rehashed"] += 1
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -97,7 +287,7 @@ def verify_token(token: str, token_type: str = "access") -> Optional[TokenData]:
         if email is None or user_id is None:
             return None
             
-        return TokenData(email=email, user_id=user_id)
+        return TokenData(email=email, user_id=user_id, name=payload.get("name"), created_at=payload.get("created_at"))
     except JWTError:
         return None
 
@@ -110,12 +300,23 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     )
     
     token = credentials.credentials
-    token_data = verify_token(token, "access")
+    token_data = verify_token_cached(token, "access")
     
     if token_data is None:
         raise credentials_exception
+
+    if AUTH_STATELESS and token_data.name and token_data.created_at:
+        # Trust the signed claims; no database access
+        _cache_stats["stateless_hits"] += 1
+        return UserInDB(
+            id=token_data.user_id,
+            email=token_data.email,
+            name=token_data.name,
+            created_at=token_data.created_at,
+            password_hash="",
+        )
         
-    user = await get_user_by_id(token_data.user_id)
+    user = await get_user_by_id_cached(token_data.user_id)
     if user is None:
         raise credentials_exception
         
@@ -128,13 +329,14 @@ async def refresh_access_token(refresh_token: str) -> Optional[str]:
     if token_data is None:
         return None
         
+    # Uncached: the new token's claims should reflect the current user
     user = await get_user_by_id(token_data.user_id)
     if user is None:
         return None
         
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id}, 
+        data=access_token_claims(user.id, user.email, user.name, user.created_at), 
         expires_delta=access_token_expires
     )
     
@@ -0,0 +1,213 @@
+# app/utils/chunk_utils.py
+import hashlib
+import re
+
+import numpy as np
+
+
+def chunk_id(chunk: str) -> str:
+    """Stable, content-derived id so re-uploads overwrite instead of colliding."""
+    return "chunk-" + hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:32]
+
+
+# -----------------------------
+# Token-bounded chunking
+# -----------------------------
+# Text is cut into units (headings, bullets, sentences), then packed greedily
+# into chunks of about `target_tokens`, never more than `max_tokens`, with the
+# last `overlap_tokens` worth of sentences repeated at the start of the next
+# chunk. A heading always opens a new chunk and stays attached to the text
+# that follows it, so short headings are no longer dropped.
+
+DEFAULT_TARGET_TOKENS = 200
+DEFAULT_MAX_TOKENS = 320
+DEFAULT_OVERLAP_TOKENS = 30
+DEFAULT_MIN_TOKENS = 20
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_HEADING = re.compile(r"^(\d+(\.\d+)*\.?\s+\S.{0,60}|[A-Z][^\n]{3,40})$")
+_BULLET = re.compile(r"^\s*([•▪◦‣\-*]|\(?[a-z0-9]{1,2}[.)])\s+")
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of whitespace to single spaces (for keys and dedup)."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def count_tokens(text: str) -> int:
+    """Cheap tokenizer-free estimate: words and punctuation marks."""
+    return len(_TOKEN.findall(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text after max_tokens tokens (as counted by count_tokens)."""
+    if max_tokens <= 0:
+        return ""
+    for i, match in enumerate(_TOKEN.finditer(text)):
+        if i == max_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    return bool(_HEADING.match(stripped)) and not stripped.endswith((".", ",", ";", ":"))
+
+
+def split_units(text: str):
+    """Split text into (kind, text) units where kind is "heading" or "text"."""
+    units = []
+    paragraph = []
+
+    def flush():
+        if paragraph:
+            joined = " ".join(paragraph)
+            units.extend(("text", s) for s in _SENTENCE_END.split(joined) if s.strip())
+            paragraph.clear()
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            flush()
+        elif _is_heading(stripped) and len(stripped) <= 70:
+            flush()
+            units.append(("heading", stripped))
+        elif _BULLET.match(line):
+            flush()
+            paragraph.append(stripped)
+        else:
+            paragraph.append(stripped)
+    flush()
+    return units
+
+
+def _split_long(text: str, max_tokens: int, count):
+    """Hard-split a unit that is longer than max_tokens on word boundaries."""
+    pieces, piece, size = [], [], 0
+    for word in text.split():
+        n = count(word)
+        if piece and size + n > max_tokens:
+            pieces.append(" ".join(piece))
+            piece, size = [], 0
+        piece.append(word)
+        size += n
+    if piece:
+        pieces.append(" ".join(piece))
+    return pieces
+
+
+def _pack(texts, sizes, target_tokens, max_tokens, overlap_tokens, min_tokens):
+    """
+    Vectorized packing of consecutive units. Chunk boundaries are found with a
+    searchsorted over the cumulative token counts, so the Python loop runs once
+    per chunk rather than once per sentence.
+    """
+    if not texts:
+        return []
+    cum = np.concatenate([[0], np.cumsum(sizes)])
+    chunks = []
+    start = 0
+    n = len(texts)
+    while start < n:
+        # Largest end such that tokens(start:end) <= target (at least one unit)
+        end = int(np.searchsorted(cum, cum[start] + target_tokens, side="right")) - 1
+        end = max(end, start + 1)
+        # Allow growing toward max_tokens only to avoid leaving a tiny tail
+        if end < n and cum[n] - cum[end] < min_tokens and cum[n] - cum[start] <= max_tokens:
+            end = n
+        chunks.append(" ".join(texts[start:end]))
+        if end >= n:
+            break
+        # Step back so the next chunk repeats up to overlap_tokens of context
+        next_start = int(np.searchsorted(cum, cum[end] - overlap_tokens, side="left")) if overlap_tokens else end
+        start = min(max(next_start, start + 1), end)
+    return chunks
+
+
+def chunk_text(
+    text: str,
+    target_tokens: int = DEFAULT_TARGET_TOKENS,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    min_tokens: int = DEFAULT_MIN_TOKENS,
+    tokenizer=None,
+):
+    """
+    Chunk one block of text (e.g. a page). `tokenizer` may be any callable
+    returning a token count; the default is count_tokens.
+    """
+    count = tokenizer or count_tokens
+    if overlap_tokens >= target_tokens:
+        raise ValueError("overlap_tokens must be smaller than target_tokens")
+
+    # Group units into sections that each start at a heading
+    sections, current = [], {"heading": None, "texts": []}
+    for kind, unit in split_units(text):
+        if kind == "heading":
+            if current["heading"] or current["texts"]:
+                sections.append(current)
+            current = {"heading": unit, "texts": []}
+        else:
+            current["texts"].append(unit)
+    if current["heading"] or current["texts"]:
+        sections.append(current)
+
+    chunks = []
+    for section in sections:
+        heading = section["heading"]
+        heading_tokens = count(heading) if heading else 0
+        limit = max(1, max_tokens - heading_tokens)
+        texts = [
+            piece
+            for unit in section["texts"]
+            for piece in (_split_long(unit, limit, count) if count(unit) > limit else [unit])
+        ]
+        if not texts:
+            # Heading with no body; merged into its neighbour below
+            if heading:
+                chunks.append(heading)
+            continue
+        sizes = np.fromiter((count(t) for t in texts), dtype=np.int64, count=len(texts))
+        body_target = max(1, target_tokens - heading_tokens)
+        for i, body in enumerate(_pack(texts, sizes, body_target, limit, overlap_tokens, min_tokens)):
+            chunks.append(f"{heading}\n{body}" if heading and i == 0 else body)
+
+    # Merge undersized chunks (bare headings, short tails) into their neighbour
+    merged = []
+    for chunk in chunks:
+        if merged and (count(merged[-1]) < min_tokens) and count(merged[-1]) + count(chunk) <= max_tokens:
+            merged[-1] = f"{merged[-1]}\n{chunk}"
+        else:
+            merged.append(chunk)
+    if len(merged) > 1 and count(merged[-1]) < min_tokens and count(merged[-2]) + count(merged[-1]) <= max_tokens:
+        tail = merged.pop()
+        merged[-1] = f"{merged[-1]}\n{tail}"
+    return merged
+
+
+def chunk_pages(pages, tokenizer=None, **kwargs):
+    """
+    Chunk an iterable of (page_number, text), yielding
+    {"text", "page_start", "page_end"} records as pages are processed.
+    Chunks only cross a page boundary when the last chunk of one page and the
+    first chunk of the next still fit in target_tokens together (e.g. slides).
+    """
+    count = tokenizer or count_tokens
+    target = kwargs.get("target_tokens", DEFAULT_TARGET_TOKENS)
+    pending = None
+    for page_no, text in pages:
+        chunks = chunk_text(text, tokenizer=tokenizer, **kwargs)
+        for i, chunk in enumerate(chunks):
+            size = count(chunk)
+            if pending is not None and i == 0 and pending["tokens"] + size <= target:
+                pending["text"] = f"{pending['text']}\n{chunk}"
+                pending["tokens"] += size
+                pending["page_end"] = page_no
+                continue
+            if pending is not None:
+                yield {k: v for k, v in pending.items() if k != "tokens"}
+            pending = {"text": chunk, "page_start": page_no, "page_end": page_no, "tokens": size}
+    if pending is not None:
+        yield {k: v for k, v in pending.items() if k != "tokens"}
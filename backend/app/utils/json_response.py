@@ -0,0 +1,40 @@
+# app/utils/json_response.py
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard json module
+    orjson = None
+
+
+# -----------------------------
+# Fast JSON responses for Mongo documents
+# -----------------------------
+# Routes return raw Motor documents in a FastJSONResponse. Returning a
+# Response skips FastAPI's jsonable_encoder/response_model pass, and the
+# encoder handles ObjectId (as str) and datetime (ISO 8601) natively, so
+# there is no separate per-document conversion walk either. Declare the route's
+# response_model anyway to keep the OpenAPI schema typed.
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        # orjson serializes datetime itself; naive datetimes match isoformat()
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
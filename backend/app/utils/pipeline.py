@@ -0,0 +1,110 @@
+# app/utils/pipeline.py
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class Stage:
+    """One node in a pipeline DAG.
+
+    `func` receives a dict of the results of its dependencies (keyed by stage
+    name). Plain functions are run in a worker thread so blocking I/O does not
+    stall the event loop; coroutine functions are awaited directly.
+    """
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    deps: List[str] = field(default_factory=list)
+
+
+class PipelineError(Exception):
+    def __init__(self, stage: str, error: Exception, timings: Dict[str, dict]):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.timings = timings
+
+
+StageCallback = Callable[[str, Any, dict], Optional[Awaitable[None]]]
+
+
+async def run_pipeline(stages: List[Stage], on_stage_done: Optional[StageCallback] = None):
+    """Run stages as soon as their dependencies finish.
+
+    Returns (results, timings). Timings hold, per stage, the start offset and
+    duration in milliseconds, plus a "total" entry for the wall-clock time.
+    Any stage failure cancels the remaining stages and raises PipelineError.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    results: Dict[str, Any] = {}
+    timings: Dict[str, dict] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+    started = time.perf_counter()
+
+    async def run(stage: Stage):
+        if stage.deps:
+            await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+        inputs = {dep: results[dep] for dep in stage.deps}
+
+        t0 = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(stage.func):
+                value = await stage.func(inputs)
+            else:
+                value = await asyncio.to_thread(stage.func, inputs)
+        except Exception as e:
+            raise PipelineError(stage.name, e, timings) from e
+        t1 = time.perf_counter()
+
+        results[stage.name] = value
+        timings[stage.name] = {
+            "start_ms": round((t0 - started) * 1000, 1),
+            "duration_ms": round((t1 - t0) * 1000, 1),
+        }
+        if on_stage_done is not None:
+            maybe = on_stage_done(stage.name, value, timings[stage.name])
+            if inspect.isawaitable(maybe):
+                await maybe
+        return value
+
+    # Create every task up front; each one waits on its own dependencies.
+    for stage in _topological(stages, by_name):
+        tasks[stage.name] = asyncio.create_task(run(stage))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    timings["total"] = {"duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+    return results, timings
+
+
+def _topological(stages: List[Stage], by_name: Dict[str, Stage]) -> List[Stage]:
+    ordered, visiting, done = [], set(), set()
+
+    def visit(stage: Stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Pipeline has a cycle at stage '{stage.name}'")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            visit(by_name[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
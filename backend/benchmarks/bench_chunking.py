@@ -0,0 +1,100 @@
+# benchmarks/bench_chunking.py
+"""
+Compare the legacy heading-regex chunker with the token-bounded chunker.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunking uploads/M6_DAA.pdf [more.pdf ...]
+
+Reports, per chunker: chunk count, token distribution, extraction time,
+encode time (if sentence-transformers is installed) and the size of a
+top-3 retrieval prompt for a sample of queries.
+"""
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from app.config import CHUNK_TARGET_TOKENS, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+from app.services import pdf_service
+from app.utils import chunk_utils
+from app.utils.chunk_utils import count_tokens
+
+TOP_K = 3
+SAMPLE_QUERIES = 20
+
+
+def _chunkers():
+    return {
+        "regex": lambda path: [
+            r["text"] for r in pdf_service.iter_regex_chunk_records(pdf_service.iter_page_texts(path))
+        ],
+        # Same settings as production (pdf_service.iter_chunk_records)
+        "token": lambda path: [
+            r["text"] for r in chunk_utils.chunk_pages(
+                pdf_service.iter_page_texts(path),
+                target_tokens=CHUNK_TARGET_TOKENS,
+                max_tokens=CHUNK_MAX_TOKENS,
+                overlap_tokens=CHUNK_OVERLAP_TOKENS,
+            )
+        ],
+    }
+
+
+def _queries(path):
+    """First sentence of evenly spaced paragraphs, independent of either chunker."""
+    units = [u for _, text in pdf_service.iter_page_texts(path) for kind, u in chunk_utils.split_units(text)
+             if kind == "text" and count_tokens(u) >= 6]
+    step = max(1, len(units) // SAMPLE_QUERIES)
+    return units[::step][:SAMPLE_QUERIES]
+
+
+def _load_model():
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    return SentenceTransformer(pdf_service.MODEL_NAME)
+
+
+def bench(path, model):
+    queries = _queries(path)
+    query_vecs = model.encode(queries, normalize_embeddings=True) if model is not None and queries else None
+
+    print(f"\n=== {path}")
+    header = f"{'chunker':<8}{'chunks':>8}{'mean tok':>10}{'p95 tok':>9}{'max tok':>9}{'extract s':>11}{'encode s':>10}{'prompt tok':>12}"
+    print(header)
+    for name, chunker in _chunkers().items():
+        t0 = time.perf_counter()
+        chunks = chunker(path)
+        extract_s = time.perf_counter() - t0
+        sizes = [count_tokens(c) for c in chunks] or [0]
+        p95 = sorted(sizes)[int(0.95 * (len(sizes) - 1))]
+
+        encode_s, prompt_tokens = float("nan"), TOP_K * statistics.mean(sizes)
+        if model is not None and chunks:
+            t0 = time.perf_counter()
+            vecs = model.encode(chunks, normalize_embeddings=True, show_progress_bar=False)
+            encode_s = time.perf_counter() - t0
+            if query_vecs is not None:
+                scores = query_vecs @ vecs.T
+                top = np.argsort(-scores, axis=1)[:, :TOP_K]
+                prompt_tokens = statistics.mean(sum(sizes[i] for i in row) for row in top)
+
+        print(f"{name:<8}{len(chunks):>8}{statistics.mean(sizes):>10.1f}{p95:>9}{max(sizes):>9}"
+              f"{extract_s:>11.3f}{encode_s:>10.3f}{prompt_tokens:>12.1f}")
+
+
+def main(paths):
+    if not paths:
+        print(__doc__)
+        sys.exit(1)
+    model = _load_model()
+    if model is None:
+        print("sentence-transformers not installed: encode time skipped, prompt size estimated as top_k * mean")
+    for path in paths:
+        bench(path, model)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,118 @@
+# benchmarks/bench_serialization.py
+"""
+Measure JSON response overhead for summary/quiz reads.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [iterations]
+
+Compares, on synthetic payloads shaped like real Mongo documents:
+  legacy  convert_mongo_doc walk -> jsonable_encoder -> JSONResponse (json module)
+  fast    raw documents -> FastJSONResponse (orjson with ObjectId/datetime hooks)
+and checks that both produce the same JSON.
+"""
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.utils import json_response
+from app.utils.json_response import FastJSONResponse
+
+WORDS = ("algorithm graph vertex edge complexity dynamic programming greedy proof "
+         "recurrence heap sort search tree balanced node path weight optimal").split()
+
+
+def convert_mongo_doc(doc):
+    """The walk routes used before FastJSONResponse: ObjectId -> str, datetime -> ISO."""
+    if isinstance(doc, list):
+        return [convert_mongo_doc(item) for item in doc]
+    if isinstance(doc, dict):
+        return {k: convert_mongo_doc(v) for k, v in doc.items()}
+    if isinstance(doc, ObjectId):
+        return str(doc)
+    if isinstance(doc, datetime):
+        return doc.isoformat()
+    return doc
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def summary_page(rng, n=20):
+    now = datetime(2025, 1, 1)
+    return {
+        "items": [
+            {
+                "_id": ObjectId(),
+                "filename": f"{_text(rng, 2).replace(' ', '_')}.pdf",
+                "audio_path": f"https://res.cloudinary.com/demo/video/upload/v1/{ObjectId()}.mp3",
+                "name": _text(rng, 3).title(),
+                "score": rng.randint(0, 5),
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(n)
+        ],
+        "next_cursor": "eyJjIjogIjIwMjUtMDEtMDFUMDA6MDA6MDAiLCAiaSI6ICI2NzAwIn0",
+    }
+
+
+def summary_detail(rng):
+    return [{"_id": ObjectId(), "summary": _text(rng, 600), "audio_path": "https://example.com/a.mp3",
+             "name": _text(rng, 3).title()}]
+
+
+def quiz(rng, n=10):
+    return {
+        "_id": ObjectId(),
+        "filename": "lecture.pdf",
+        "base_id": "lecture",
+        "summary_id": str(ObjectId()),
+        "questions": [
+            {"question": _text(rng, 18) + "?", "options": [_text(rng, 5) for _ in range(4)], "answer": _text(rng, 5)}
+            for _ in range(n)
+        ],
+        "name": "Design and Analysis of Algorithms",
+        "created_at": datetime(2025, 1, 1, 12, 30, 15, 250000),
+    }
+
+
+def legacy(doc):
+    return JSONResponse(jsonable_encoder(convert_mongo_doc(doc))).body
+
+
+def fast(doc):
+    return FastJSONResponse(doc).body
+
+
+def _time(fn, doc, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(doc)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(iterations=2000):
+    rng = random.Random(0)
+    payloads = {
+        "summary list (20)": summary_page(rng),
+        "summary detail": summary_detail(rng),
+        "quiz (10 questions)": quiz(rng),
+    }
+    encoder = "orjson" if json_response.orjson is not None else "json (orjson not installed)"
+    print(f"encoder: {encoder}, iterations: {iterations}")
+    print(f"{'payload':<22}{'bytes':>8}{'legacy µs':>12}{'fast µs':>10}{'speedup':>9}")
+    for name, doc in payloads.items():
+        assert json.loads(legacy(doc)) == json.loads(fast(doc)), name
+        t_legacy = _time(legacy, doc, iterations)
+        t_fast = _time(fast, doc, iterations)
+        print(f"{name:<22}{len(fast(doc)):>8}{t_legacy:>12.1f}{t_fast:>10.1f}{t_legacy / t_fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import summarizer, chat, realtime_chat, auth
-from app.db.mongo import setup_db_indexes
+from app.routes import summarizer, chat, realtime_chat, auth, health, audio
+from app.db.mongo import setup_db_indexes, close_client as close_mongo_client
+from app.services import gemini_service, job_service, model_registry, embedding_service, tts_service, stt_service, session_store, pdf_service
+from app.config import MODEL_PRELOAD
+from app.utils.auth import shutdown_hash_executor
 
 app = FastAPI()
 
@@ -19,8 +22,65 @@ app.include_router(summarizer.router, prefix="/api/summarize", tags=["summarizer
 app.include_router(chat.router, prefix="/chatbot")
 app.include_router(realtime_chat.router)
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
+app.include_router(health.router, prefix="/health", tags=["health"])
+app.include_router(audio.router, tags=["audio"])
 
 # Setup database indexes
 @app.on_event("startup")
 async def startup_db_client():
     await setup_db_indexes()
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    close_mongo_client()
+
+# Open the shared Gemini HTTP pool for the lifetime of the app (TTS pool closes with it)
+@app.on_event("startup")
+async def startup_gemini_client():
+    await gemini_service.start_client()
+
+@app.on_event("shutdown")
+async def shutdown_gemini_client():
+    await gemini_service.close_client()
+    await tts_service.close_client()
+
+# Realtime session store (Redis connection, if configured)
+@app.on_event("shutdown")
+async def shutdown_session_store():
+    await session_store.close_store()
+
+# Background summarize job workers
+@app.on_event("startup")
+async def startup_job_workers():
+    await job_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_job_workers():
+    await job_service.stop()
+
+# Load and warm up ML models in the background so the worker answers immediately
+@app.on_event("startup")
+async def startup_models():
+    embedding_service.start()
+    if MODEL_PRELOAD:
+        # Starts and warms the embedding pool (or the in-process model)
+        model_registry.start_background_loading()
+
+@app.on_event("shutdown")
+async def shutdown_embedding_service():
+    await embedding_service.stop()
+
+# PDF page-extraction process pool
+@app.on_event("shutdown")
+async def shutdown_pdf_extract_pool():
+    pdf_service.shutdown_extract_pool()
+
+# Speech-to-text thread pool
+@app.on_event("shutdown")
+async def shutdown_stt_service():
+    stt_service.shutdown()
+
+# Password hashing thread pool
+@app.on_event("shutdown")
+async def shutdown_auth_hashing():
+    shutdown_hash_executor()
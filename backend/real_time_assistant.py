@@ -98,7 +98,7 @@ async def main():
                 # 3️⃣ Generate answer from Gemini
                 # -----------------------------
                 try:
-                    answer = gemini_service.get_answer(user_query, combined_context)
+                    answer = await gemini_service.get_answer(user_query, combined_context)
                     print("🤖 Assistant:", answer)
                 except Exception as e:
                     answer = "⚠️ Sorry, I could not generate an answer."
@@ -0,0 +1,67 @@
+from app.utils.chunk_utils import chunk_pages, chunk_text, count_tokens
+
+SENTENCES = " ".join(f"Sentence number {i} talks about topic {i} in detail." for i in range(60))
+SETTINGS = {"target_tokens": 50, "max_tokens": 80, "overlap_tokens": 15}
+
+
+def test_chunks_never_exceed_max_tokens():
+    # One run-on "sentence" far longer than max_tokens plus ordinary sentences
+    run_on = " ".join(f"word{i}" for i in range(500))
+    chunks = chunk_text(f"{SENTENCES}\n\n{run_on}", **SETTINGS)
+    assert len(chunks) > 1
+    assert all(count_tokens(c) <= SETTINGS["max_tokens"] for c in chunks)
+
+
+def test_overlap_carries_sentences_into_next_chunk():
+    chunks = chunk_text(SENTENCES, **SETTINGS)
+    assert len(chunks) > 2
+    for prev, nxt in zip(chunks, chunks[1:]):
+        last_sentence = prev.rsplit(". ", 1)[-1]
+        assert nxt.startswith(last_sentence)
+        assert count_tokens(last_sentence) <= SETTINGS["overlap_tokens"]
+
+
+def test_no_overlap_when_disabled():
+    chunks = chunk_text(SENTENCES, **{**SETTINGS, "overlap_tokens": 0})
+    assert " ".join(chunks) == SENTENCES
+
+
+def test_heading_opens_chunk_with_its_section():
+    text = f"1. Introduction\n{SENTENCES[:300]}\n2. Methods\n{SENTENCES[300:700]}"
+    chunks = chunk_text(text, **SETTINGS)
+    intro = [c for c in chunks if "1. Introduction" in c]
+    methods = [c for c in chunks if "2. Methods" in c]
+    assert len(intro) == len(methods) == 1
+    # Each heading starts its chunk and is followed by its own body text
+    assert intro[0].startswith("1. Introduction\nSentence number 0")
+    assert methods[0].startswith("2. Methods\n")
+    assert count_tokens(methods[0]) > count_tokens("2. Methods")
+    # No chunk mixes the end of one section with the next heading
+    assert not any("2. Methods" in c and not c.startswith("2. Methods") for c in chunks)
+
+
+def test_short_heading_is_not_dropped():
+    chunks = chunk_text("Summary\n\nOne short line of text follows the heading here.", **SETTINGS)
+    assert chunks and chunks[0].startswith("Summary")
+
+
+def test_page_span_metadata():
+    pages = [
+        (1, "Short page one text here."),
+        (2, "Short page two text continues."),
+        (3, SENTENCES),
+    ]
+    records = list(chunk_pages(pages, **SETTINGS))
+    # Two small pages fit in one chunk; the long page gets its own chunks
+    assert records[0]["page_start"] == 1 and records[0]["page_end"] == 2
+    assert "page one" in records[0]["text"] and "page two" in records[0]["text"]
+    assert len(records) > 2
+    assert all(r["page_start"] == r["page_end"] == 3 for r in records[1:])
+    assert set(records[0]) == {"text", "page_start", "page_end"}
+
+
+def test_chunk_pages_does_not_merge_across_pages_past_target():
+    pages = [(1, SENTENCES[:250]), (2, SENTENCES[250:500])]
+    records = list(chunk_pages(pages, **SETTINGS))
+    assert all(r["page_start"] == r["page_end"] for r in records)
+    assert {r["page_start"] for r in records} == {1, 2}
@@ -11,71 +11,81 @@ const Realtime = () => {
   const [isProcessing, setIsProcessing] = useState(false); // 🔥 Processing state
   const [isAssistantSpeaking, setIsAssistantSpeaking] = useState(false); // 🔥 Speaking state
   const currentAudio = useRef(null); // 🔥 Track current audio for interruption
+  const audioQueue = useRef([]); // 🔥 Sentence audio waiting to play
   const messagesEndRef = useRef(null);
 
   useEffect(() => {
-    ws.current = new WebSocket("ws://127.0.0.1:8000/ws/assistant");
+    // 🔥 Resume the same session (memory, collection) after a reconnect
+    const sessionId = sessionStorage.getItem("assistantSessionId");
+    const query = sessionId ? `?session_id=${encodeURIComponent(sessionId)}` : "";
+    ws.current = new WebSocket(`ws://127.0.0.1:8000/ws/assistant${query}`);
 
     ws.current.onopen = () => {
       // 🔥 tell backend which collection to use
       ws.current.send(`SET_COLLECTION:${collection}`);
     };
 
-    ws.current.onmessage = async (event) => {
-      try {
-        const data = JSON.parse(event.data);
+    // 🔥 Play sentence audio frames one after another as they arrive
+    const playNextAudio = () => {
+      if (currentAudio.current || audioQueue.current.length === 0) return;
+      const audioBlob = audioQueue.current.shift();
+      const audioUrl = URL.createObjectURL(audioBlob);
+      const audio = new Audio(audioUrl);
+      currentAudio.current = audio;
+      setIsAssistantSpeaking(true);
 
-        if (data.type === "user") {
-          setMessages((prev) => [
-            ...prev,
-            { type: "user", content: data.content },
-          ]);
-          setIsProcessing(true); // 🔥 Start processing when user message received
-        } else if (data.type === "assistant") {
-          setIsProcessing(false); // 🔥 Stop processing when assistant responds
-          setMessages((prev) => [
-            ...prev,
-            { type: "assistant", content: data.text },
-          ]);
-
-          if (data.audio) {
-            setIsAssistantSpeaking(true); // 🔥 Assistant starts speaking
-            const audioBytes = Uint8Array.from(atob(data.audio), (c) =>
-              c.charCodeAt(0)
-            );
-            const audioBlob = new Blob([audioBytes], { type: "audio/wav" });
-            const audioUrl = URL.createObjectURL(audioBlob);
-            const audio = new Audio(audioUrl);
-            currentAudio.current = audio; // 🔥 Store reference for interruption
-
-            // Handle audio end
-            audio.onended = () => {
-              setIsAssistantSpeaking(false);
-              currentAudio.current = null;
-            };
-
-            audio.play();
-          }
-        }
-      } catch {
-        setIsProcessing(false); // 🔥 Stop processing on error
-        const audioBlob = new Blob([event.data], { type: "audio/wav" });
-        const audioUrl = URL.createObjectURL(audioBlob);
-        const audio = new Audio(audioUrl);
+      audio.onended = () => {
+        URL.revokeObjectURL(audioUrl);
+        currentAudio.current = null;
+        if (audioQueue.current.length === 0) setIsAssistantSpeaking(false);
+        playNextAudio();
+      };
 
-        setIsAssistantSpeaking(true);
-        currentAudio.current = audio;
+      audio.play();
+    };
 
-        audio.onended = () => {
-          setIsAssistantSpeaking(false);
-          currentAudio.current = null;
-        };
+    ws.current.onmessage = async (event) => {
+      // Binary frames are MP3 audio for one sentence of the answer
+      if (event.data instanceof Blob) {
+        audioQueue.current.push(new Blob([event.data], { type: "audio/mpeg" }));
+        playNextAudio();
+        return;
+      }
+
+      const data = JSON.parse(event.data);
 
-        audio.play();
+      if (data.type === "session") {
+        sessionStorage.setItem("assistantSessionId", data.session_id);
+      } else if (data.type === "user") {
         setMessages((prev) => [
           ...prev,
-          { type: "assistant", content: "Voice response..." },
+          { type: "user", content: data.content },
         ]);
+        setIsProcessing(true); // 🔥 Start processing when user message received
+      } else if (data.type === "assistant_delta") {
+        setIsProcessing(false); // 🔥 First tokens arrived
+        setMessages((prev) => {
+          const last = prev[prev.length - 1];
+          if (last && last.type === "assistant" && last.streaming) {
+            return [
+              ...prev.slice(0, -1),
+              { ...last, content: last.content + data.text },
+            ];
+          }
+          return [
+            ...prev,
+            { type: "assistant", content: data.text, streaming: true },
+          ];
+        });
+      } else if (data.type === "assistant") {
+        setIsProcessing(false); // 🔥 Stop processing when assistant responds
+        setMessages((prev) => {
+          const last = prev[prev.length - 1];
+          const rest = last && last.streaming ? prev.slice(0, -1) : prev;
+          return [...rest, { type: "assistant", content: data.text }];
+        });
+      } else if (data.type === "error") {
+        setIsProcessing(false); // 🔥 Stop processing on error
       }
     };
 
@@ -94,6 +104,7 @@ const Realtime = () => {
       setIsAssistantSpeaking(false);
       currentAudio.current = null;
     }
+    audioQueue.current = [];
 
     // 🔥 Reset processing state when user starts speaking
     setIsProcessing(false);
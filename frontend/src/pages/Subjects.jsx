@@ -37,29 +37,37 @@ const Subjects = () => {
     "bg-teal-500",
   ];
 
-  // Fetch subjects from MongoDB
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Transform MongoDB data to match our subject format
+  const toSubject = (item, index) => ({
+    id: item._id,
+    name: item.name,
+    color: colorClass[index % colorClass.length], // Tailwind class for SubjectCard
+    hexColor: colorClasses[index % colorClasses.length], // Hex code for PieChart
+    points: item.score || 0,
+    accuracy: (item.score / 5) * 100,
+    audio_path: item.audio_path,
+    percentage: (item.score / 5) * 100,
+  });
+
+  // Fetch one page of subjects from MongoDB (newest first)
+  const fetchPage = async (cursor) => {
+    const response = await axios.get(
+      "http://localhost:8000/api/summarize/summaries",
+      { params: { limit: 24, ...(cursor ? { cursor } : {}) } }
+    );
+    setNextCursor(response.data.next_cursor);
+    return response.data.items;
+  };
+
   useEffect(() => {
     const fetchSubjects = async () => {
       try {
         setLoading(true);
-        const response = await axios.get(
-          "http://localhost:8000/api/summarize/summaries"
-        );
-
-        // Transform MongoDB data to match our subject format
-        const transformedSubjects = response.data.map((item, index) => ({
-          id: item._id,
-          name: item.name,
-          color: colorClass[index % colorClass.length], // Tailwind class for SubjectCard
-          hexColor: colorClasses[index % colorClasses.length], // Hex code for PieChart
-          points: item.score || 0,
-          accuracy: (item.score / 5) * 100,
-          summary: item.summary,
-          audio_path: item.audio_path,
-          percentage: (item.score / 5) * 100,
-        }));
-
-        setSubjects(transformedSubjects);
+        const items = await fetchPage(null);
+        setSubjects(items.map(toSubject));
         setError(null);
       } catch (err) {
         console.error("Error fetching subjects:", err);
@@ -72,6 +80,21 @@ const Subjects = () => {
     fetchSubjects();
   }, []);
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const items = await fetchPage(nextCursor);
+      setSubjects((prev) => [
+        ...prev,
+        ...items.map((item, i) => toSubject(item, prev.length + i)),
+      ]);
+    } catch (err) {
+      console.error("Error fetching more subjects:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Helper function to get user's first name
   const getUserFirstName = () => {
     if (!currentUser?.name) return "Student";
@@ -171,6 +194,18 @@ const Subjects = () => {
           </div>
         )}
 
+        {!loading && !error && nextCursor && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 bg-gray-100 hover:bg-gray-200 text-gray-800 rounded-md transition-colors disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
+
         <CreateContentModal
           isOpen={isModalOpen}
           onClose={() => setIsModalOpen(false)}